@@ -261,3 +261,32 @@ create table if not exists directed_slice
     directed_id varchar,
     result_path varchar
 );
+
+
+-- Indexes on foreign key columns the workers filter and join on
+-- (Postgres does not index referencing columns by itself)
+
+create index if not exists ix_bugs_task_id on bugs (task_id);
+create index if not exists ix_bug_profiles_task_id on bug_profiles (task_id);
+create index if not exists ix_bug_profile_status_bug_profile_id on bug_profile_status (bug_profile_id);
+create index if not exists ix_sarifs_task_id on sarifs (task_id);
+create index if not exists ix_seeds_task_id on seeds (task_id);
+create index if not exists ix_sarif_results_task_id_sarif_id on sarif_results (task_id, sarif_id);
+create index if not exists ix_patches_bug_profile_id on patches (bug_profile_id);
+create index if not exists ix_patch_bugs_patch_id on patch_bugs (patch_id);
+create index if not exists ix_patch_status_patch_id on patch_status (patch_id);
+create index if not exists ix_patch_submit_patch_id on patch_submit (patch_id);
+create index if not exists ix_sarif_slice_sarif_id on sarif_slice (sarif_id);
+
+-- Hand out ids in blocks for the append-heavy tables, so concurrent writers
+-- don't contend on the sequence for every insert. Not for bugs: the scheduler
+-- polls it for ids above the last one seen, so ids must follow insert order
+
+alter sequence if exists bugs_id_seq cache 1;
+alter sequence if exists patches_id_seq cache 1000;
+alter sequence if exists patch_bugs_id_seq cache 1000;
+alter sequence if exists patch_debug_id_seq cache 1000;
+alter sequence if exists seeds_id_seq cache 1000;
+alter sequence if exists sarif_results_id_seq cache 1000;
+alter sequence if exists sarif_slice_id_seq cache 1000;
+alter sequence if exists directed_slice_id_seq cache 1000;
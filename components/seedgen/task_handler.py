@@ -6,13 +6,12 @@ import tarfile
 import shutil
 import subprocess
 import json
-import threading
 import functools
+import tempfile
 from dataclasses import dataclass
 from typing import List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from opentelemetry import trace, context
-from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 
 import pika
 
@@ -26,10 +25,23 @@ from infra.aixcc import (
     run_codex_mode
 )
 from utils.task import TaskData
-from utils.telemetry import init_opentelemetry, get_task_span, start_span_with_crs_inheritance
+from utils.telemetry import init_opentelemetry, get_task_context, start_span_with_crs_inheritance
 from utils.redis import init_redis
 import utils.db as db
 
+# Seed archives are read back by cmin and the fuzzers as plain .tar.gz, so keep
+# the gzip format but favour speed over ratio when packing them.
+SEED_ARCHIVE_COMPRESSLEVEL = 1
+
+# tarfile copies member data in 16KiB blocks by default, which means a lot of
+# Python-level read/write round-trips for multi-GB source archives.
+TAR_COPY_BUFSIZE = 2 * 1024 * 1024
+
+# Residual extractions from a previous attempt are moved aside and deleted
+# here so that large rmtree walks stay off the task's critical path.
+_cleanup_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="cleanup")
+
 
 def extract_from_storage(tar_path: str, dest_dir: str) -> str:
     """
@@ -39,24 +51,30 @@ def extract_from_storage(tar_path: str, dest_dir: str) -> str:
     if not tar_path:
         return ""
 
-    with tarfile.open(tar_path, 'r:gz') as tar:
+    with tarfile.open(tar_path, 'r:gz', copybufsize=TAR_COPY_BUFSIZE) as tar:
         top_level_dirs = set()
         for member in tar.getmembers():
-            root = os.path.normpath(member.name).split('/')[0]
-            if root:  # Make sure it's not empty
+            name = member.name
+            while name.startswith('./'):
+                name = name[2:]
+            root = name.split('/', 1)[0]
+            if root and root not in (".", ".."):  # Make sure it's a real entry
                 top_level_dirs.add(root)
 
-        # Remove existing residual extracted files (in case of a task being requeued)
-        for root in top_level_dirs:
-            existing_path = os.path.join(dest_dir, root)
-            if os.path.exists(existing_path):
-                if os.path.isdir(existing_path):
-                    shutil.rmtree(existing_path)
-                else:
-                    os.remove(existing_path)
-
-        # Extract all files
-        tar.extractall(path=dest_dir)
+        # Extract everything into a fresh staging directory next to dest_dir
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=dest_dir)
+        tar.extractall(path=staging_dir)
+
+    # Move residual extracted files aside (in case of a task being requeued)
+    # and swap the freshly extracted ones into place
+    for root in top_level_dirs:
+        existing_path = os.path.join(dest_dir, root)
+        if os.path.lexists(existing_path):
+            trash_dir = tempfile.mkdtemp(prefix=".trash-", dir=dest_dir)
+            os.rename(existing_path, os.path.join(trash_dir, root))
+            _cleanup_executor.submit(shutil.rmtree, trash_dir, True)
+        os.rename(os.path.join(staging_dir, root), existing_path)
+    _cleanup_executor.submit(shutil.rmtree, staging_dir, True)
 
     # If there's exactly one top-level directory, return it
     if len(top_level_dirs) == 1:
@@ -65,6 +83,25 @@ def extract_from_storage(tar_path: str, dest_dir: str) -> str:
     return None
 
 
+def apply_diffs(diff_files: List[str], target_dir: str):
+    """
+    Apply all diff files to target_dir with a single `patch` process,
+    feeding the concatenated diffs through stdin.
+    """
+    chunks = []
+    for diff_file_path in diff_files:
+        with open(diff_file_path, "rb") as patch_file:
+            data = patch_file.read()
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        chunks.append(data)
+
+    subprocess.run(["patch", "--batch", "--no-backup-if-mismatch", "-p1"],
+                   input=b"".join(chunks), check=True, cwd=target_dir)
+    for diff_file_path in diff_files:
+        print(f"[+] Applied diff from {diff_file_path} to {target_dir}")
+
+
 def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, gen_model: str):
     """
     Given a TaskData, extract the repos, fuzzing_tooling, diff archives
@@ -93,36 +130,27 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
     print(f"- Fuzz tooling extracted into: {fuzz_tooling_dir}")
     print(f"- Diff extracted into: {diff_dir}")
 
+    focus_path = os.path.join(task_dir, task.focus)
+    fuzz_tooling = os.path.join(task_dir, fuzz_tooling_dir)
+    diff_path = os.path.join(task_dir, diff_dir) if diff_dir else None
+
     # Apply the diff files (code omitted for brevity)
-    if diff_dir:
-        diff_path = os.path.join(task_dir, diff_dir)
-        apply_diff_command = ["patch", "--batch",
-                              "--no-backup-if-mismatch", "-p1"]
-        if os.path.isfile(diff_path) and (diff_path.endswith('.patch') or diff_path.endswith('.diff')):
-            with open(diff_path, "rb") as patch_file:
-                subprocess.run(apply_diff_command, stdin=patch_file,
-                               check=True, cwd=os.path.join(task_dir, task.focus))
-            print(
-                f"[+] Applied diff from {diff_path} to {os.path.join(task_dir, task.focus)}")
+    if diff_path:
+        if os.path.isfile(diff_path) and diff_path.endswith(('.patch', '.diff')):
+            diff_files = [diff_path]
         elif os.path.isdir(diff_path):
-            diff_files = [f for f in os.listdir(diff_path) if f.endswith(
-                '.patch') or f.endswith('.diff')]
-            for diff_file in diff_files:
-                diff_file_path = os.path.join(diff_path, diff_file)
-                if os.path.exists(diff_file_path):
-                    with open(diff_file_path, "rb") as patch_file:
-                        subprocess.run(apply_diff_command, stdin=patch_file,
-                                       check=True, cwd=os.path.join(task_dir, task.focus))
-                    print(
-                        f"[+] Applied diff from {diff_file_path} to {os.path.join(task_dir, task.focus)}")
-                else:
-                    print(f"[!] Diff file {diff_file_path} does not exist")
+            diff_files = sorted(
+                os.path.join(diff_path, f) for f in os.listdir(diff_path)
+                if f.endswith(('.patch', '.diff')))
         else:
+            diff_files = []
             print(
                 f"[!] The provided diff path {diff_path} is neither a valid file nor a directory.")
 
+        if diff_files:
+            apply_diffs(diff_files, focus_path)
+
     # Prepare for seed generation
-    fuzz_tooling = os.path.join(task_dir, fuzz_tooling_dir)
     os.makedirs(".tmp", exist_ok=True)
 
     project_yaml_path = validate_environment(fuzz_tooling, task.project_name)
@@ -130,15 +158,12 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
     print_project_info(task.project_name, project_config)
 
     def run_mode_with_span(mode_func, mode_name, *args, parent_context, **kwargs):
-        token = context.attach(parent_context)
-        try:
-            with start_span_with_crs_inheritance(
-                f"generate in {mode_name} mode",
-                attributes={"crs.action.mode": mode_name}
-            ) as mode_span:
-                return mode_func(*args, **kwargs)
-        finally:
-            context.detach(token)
+        with start_span_with_crs_inheritance(
+            f"generate in {mode_name} mode",
+            parent_context=parent_context,
+            attributes={"crs.action.mode": mode_name}
+        ) as mode_span:
+            return mode_func(*args, **kwargs)
 
     # Run SeedMini and SeedGen in parallel using a thread pool
     with ThreadPoolExecutor(max_workers=2) as executor:
@@ -146,8 +171,8 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
             run_mode_with_span, run_mini_mode, "mini",
             task.project_name,
             project_config,
-            os.path.join(task_dir, task.focus),
-            os.path.join(task_dir, fuzz_tooling_dir),
+            focus_path,
+            fuzz_tooling,
             gen_model,
             save_result_to_db,
             task,
@@ -159,8 +184,8 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
             run_mode_with_span, run_full_mode, "full",
             task.project_name,
             project_config,
-            os.path.join(task_dir, task.focus),
-            os.path.join(task_dir, fuzz_tooling_dir),
+            focus_path,
+            fuzz_tooling,
             gen_model,
             save_result_to_db,
             task,
@@ -176,15 +201,15 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
                 run_mode_with_span, run_mcp_mode, "mcp",
                 task.project_name,
                 project_config,
-                os.path.join(task_dir, task.focus),
-                os.path.join(task_dir, fuzz_tooling_dir),
+                focus_path,
+                fuzz_tooling,
                 gen_model,
                 save_result_to_db,
                 save_mcp_seeds_as_bugs,
                 task,
                 database_url,
                 storage_dir,
-                os.path.join(task_dir, diff_dir),
+                diff_path,
                 parent_context=context.get_current()
             )
             future_list = [future_full, future_mini, future_mcp]
@@ -193,8 +218,8 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
                 run_mode_with_span, run_codex_mode, "codex",
                 task.project_name,
                 project_config,
-                os.path.join(task_dir, task.focus),
-                os.path.join(task_dir, fuzz_tooling_dir),
+                focus_path,
+                fuzz_tooling,
                 gen_model,
                 save_result_to_db,
                 task,
@@ -219,18 +244,39 @@ def run_seedgen_for_task(task: TaskData, database_url: str, storage_dir: str, ge
 
 
 def run_seedgen_with_span(task, database_url, storage_dir, gen_model, parent_context):
-    # Activate the parent context in this thread
-    token = context.attach(parent_context)
-    try:
-        with start_span_with_crs_inheritance(
-            f"generate with {gen_model}",
-            attributes={"crs.action.model": gen_model}
-        ) as gen_model_span:
-            # Call the actual function, passing the span/context if needed
-            run_seedgen_for_task(task, database_url,
-                                 storage_dir, gen_model)
-    finally:
-        context.detach(token)
+    # Parent the span to the context handed over from the dispatching thread
+    with start_span_with_crs_inheritance(
+        f"generate with {gen_model}",
+        parent_context=parent_context,
+        attributes={"crs.action.model": gen_model}
+    ) as gen_model_span:
+        # Call the actual function, passing the span/context if needed
+        run_seedgen_for_task(task, database_url,
+                             storage_dir, gen_model)
+
+
+def compress_seed_dir(seed_dir: str, seed_tar_gz_path: str):
+    """
+    Pack seed_dir into a .tar.gz at seed_tar_gz_path, using pigz for parallel
+    compression when it is available and falling back to tarfile otherwise.
+    """
+    if shutil.which("pigz"):
+        try:
+            with open(seed_tar_gz_path, "wb") as out:
+                tar_proc = subprocess.Popen(
+                    ["tar", "-cf", "-", "-C", seed_dir, "."], stdout=subprocess.PIPE)
+                pigz_proc = subprocess.run(
+                    ["pigz", f"-{SEED_ARCHIVE_COMPRESSLEVEL}"], stdin=tar_proc.stdout, stdout=out)
+                tar_proc.stdout.close()
+                if tar_proc.wait() == 0 and pigz_proc.returncode == 0:
+                    return
+            print(f"[!] pigz compression of {seed_dir} failed, falling back to tarfile")
+        except OSError as e:
+            print(f"[!] pigz compression of {seed_dir} failed ({e}), falling back to tarfile")
+
+    with tarfile.open(seed_tar_gz_path, "w:gz", compresslevel=SEED_ARCHIVE_COMPRESSLEVEL,
+                      copybufsize=TAR_COPY_BUFSIZE) as tar:
+        tar.add(seed_dir, arcname=".")
 
 
 def save_result_to_db(
@@ -259,8 +305,7 @@ def save_result_to_db(
         seed_tar_gz_path = os.path.join(
             seed_storage_dir,
             f"{seed_type}_{gen_model.replace(".", "-")}_{task.task_id}_{harness_binary}.tar.gz")
-        with tarfile.open(seed_tar_gz_path, "w:gz") as tar:
-            tar.add(seed_dir, arcname=".")
+        compress_seed_dir(seed_dir, seed_tar_gz_path)
 
         # Create DB record
         new_seed_record = db.Seed(
@@ -290,6 +335,26 @@ def save_result_to_db(
         db_session.close()
 
 
+def iter_seed_files(seed_dir: str):
+    """
+    Yield (path, relative path) for every file below seed_dir, walking the
+    tree with os.scandir so the file type comes from the DirEntry.
+    """
+    if not os.path.isdir(seed_dir):
+        return
+
+    stack = [(seed_dir, "")]
+    while stack:
+        current_dir, rel_dir = stack.pop()
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path))
+                elif entry.is_file():
+                    yield entry.path, rel_path
+
+
 def save_mcp_seeds_as_bugs(task, seed_dir, sanitizers, harnesses, storage_dir, database_url):
     db_session = db.connect_database(database_url)
 
@@ -299,21 +364,17 @@ def save_mcp_seeds_as_bugs(task, seed_dir, sanitizers, harnesses, storage_dir, d
         os.makedirs(seed_storage_dir, exist_ok=True)
 
         # Get all files in the corpus directory
-        seed_files = []
-        for root, _, files in os.walk(seed_dir):
-            for file in files:
-                seed_files.append(os.path.join(root, file))
+        seed_files = list(iter_seed_files(seed_dir))
+
+        # Create the destination directory tree once up front
+        for rel_dir in {os.path.dirname(rel_path) for _, rel_path in seed_files}:
+            if rel_dir:
+                os.makedirs(os.path.join(seed_storage_dir, rel_dir), exist_ok=True)
 
         # Copy each file to the storage directory and create bug records
-        for file_path in seed_files:
-            # Get relative path from task_corpus_dir
-            rel_path = os.path.relpath(file_path, seed_dir)
-            # Create destination path
+        for file_path, rel_path in seed_files:
             dest_path = os.path.join(seed_storage_dir, rel_path)
-            # Ensure destination directory exists
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-            # Copy the file
-            shutil.copy2(file_path, dest_path)
+            shutil.copyfile(file_path, dest_path)
 
             # Create a bug record for each sanitizer and harness combination
             for sanitizer in sanitizers:
@@ -394,19 +455,16 @@ def listen_for_tasks(
     parse the message into a TaskData object, and process it.
     """
 
-    # 1. Connect to RabbitMQ
-    connection = pika.BlockingConnection(
-        pika.URLParameters(rabbitmq_host)
-    )
-    channel = connection.channel()
+    # prefetch_count 0 would mean "unlimited" to RabbitMQ and cannot size the pool
+    if prefetch_count < 1:
+        raise ValueError(f"prefetch_count must be at least 1, got {prefetch_count}")
 
-    # 2. Make sure the queue exists (idempotent)
-    channel.queue_declare(
-        queue=queue_name,
-        durable=True
-    )
+    # At most prefetch_count messages are unacked at once, so a pool of that
+    # size processes every delivered task without spawning a thread per message
+    message_executor = ThreadPoolExecutor(
+        max_workers=prefetch_count, thread_name_prefix="msg")
 
-    # 3. Define a callback to process messages
+    # 1. Define a callback to process messages
     def callback(ch, method, properties, body, connection):
         try:
             data_dict = json.loads(body)
@@ -426,10 +484,11 @@ def listen_for_tasks(
 
             print(f"[*] Received task: {task}")
 
-            # Start a new thread for processing
-            processing_thread = threading.Thread(
-                target=process_task, args=(connection, ch, method, properties, body, task, gen_model_list))
-            processing_thread.start()
+            # Hand the task to the bounded worker pool for processing
+            future = message_executor.submit(
+                process_task, connection, ch, method, properties, body, task, gen_model_list)
+            future.add_done_callback(functools.partial(
+                on_task_done, connection, ch, method.delivery_tag, task))
 
         except Exception as e:
             print(f"[!] Failed to parse task: {e}")
@@ -437,97 +496,101 @@ def listen_for_tasks(
 
     def process_task(connection, ch, method, properties, body, task, gen_model_list):
         # Retrieve global task span from redis
-        payload = get_task_span(task.task_id)
-        if payload:
-            propagator = TraceContextTextMapPropagator()
-            parent_context = propagator.extract(json.loads(payload))
-            token = context.attach(parent_context)
-        else:
-            token = None
+        parent_context = get_task_context(task.task_id)
 
-        try:
-            # Retrieve the current retry count from message headers.
-            retry_count = 0
-            if properties.headers and "x-retry" in properties.headers:
-                retry_count = properties.headers["x-retry"]
-            with start_span_with_crs_inheritance(
-                f"attempt #{retry_count+1}",
-                attributes={
-                    "crs.action.category": "input_generation",
-                    "crs.action.name": "generate_fuzzing_seeds",
-                    "crs.action.target": task.project_name
-                }
-            ) as process_span:
-                # Save the current context to propagate to threads
-                parent_context = context.get_current()
-                try:
-                    # Use ThreadPoolExecutor to run seedgen for all models in parallel
-                    with ThreadPoolExecutor(max_workers=len(gen_model_list)) as executor:
-                        futures = []
-                        for gen_model in gen_model_list:
-                            future = executor.submit(
-                                run_seedgen_with_span, task, database_url, storage_dir, gen_model, parent_context)
-                            futures.append((future, gen_model))
-
-                        # Wait for all futures to complete and handle any exceptions
-                        errors = []
-                        for future, gen_model in futures:
-                            try:
-                                future.result()
-                                print(
-                                    f"[*] Seedgen workflow finished for task {task.task_id} with Generative Model {gen_model}")
-                            except Exception as e:
-                                print(
-                                    f"[!] Error processing task {task.task_id} with model {gen_model}: {e}")
-                                errors.append((gen_model, e))
-
-                        if errors:
-                            error_msg = "; ".join(
-                                [f"{model}: {err}" for model, err in errors])
-                            raise Exception(
-                                f"Seedgen failed for some models: {error_msg}")
+        # Retrieve the current retry count from message headers.
+        retry_count = 0
+        if properties.headers and "x-retry" in properties.headers:
+            retry_count = properties.headers["x-retry"]
+        with start_span_with_crs_inheritance(
+            f"attempt #{retry_count+1}",
+            parent_context=parent_context,
+            attributes={
+                "crs.action.category": "input_generation",
+                "crs.action.name": "generate_fuzzing_seeds",
+                "crs.action.target": task.project_name
+            }
+        ) as process_span:
+            # Save the current context to propagate to threads
+            parent_context = context.get_current()
+            try:
+                # Use ThreadPoolExecutor to run seedgen for all models in parallel
+                with ThreadPoolExecutor(max_workers=len(gen_model_list)) as executor:
+                    futures = []
+                    for gen_model in gen_model_list:
+                        future = executor.submit(
+                            run_seedgen_with_span, task, database_url, storage_dir, gen_model, parent_context)
+                        futures.append((future, gen_model))
+
+                    # Wait for all futures to complete and handle any exceptions
+                    errors = []
+                    for future, gen_model in futures:
+                        try:
+                            future.result()
+                            print(
+                                f"[*] Seedgen workflow finished for task {task.task_id} with Generative Model {gen_model}")
+                        except Exception as e:
+                            print(
+                                f"[!] Error processing task {task.task_id} with model {gen_model}: {e}")
+                            errors.append((gen_model, e))
+
+                    if errors:
+                        error_msg = "; ".join(
+                            [f"{model}: {err}" for model, err in errors])
+                        raise Exception(
+                            f"Seedgen failed for some models: {error_msg}")
+                print(
+                    f"[*] Seedgen workflow finished for task {task.task_id} for all models")
+                cb = functools.partial(
+                    ack_nack_message, ch, method.delivery_tag)
+                connection.ioloop.add_callback_threadsafe(cb)
+            except Exception as e:
+                print(f"[!] Error processing task {task.task_id}: {e}")
+                print(traceback.format_exc())
+
+                # Retrieve the current retry count from message headers.
+                retry_count = 0
+                if properties.headers and "x-retry" in properties.headers:
+                    retry_count = properties.headers["x-retry"]
+
+                if retry_count < 3:
+                    new_retry = retry_count + 1
                     print(
-                        f"[*] Seedgen workflow finished for task {task.task_id} for all models")
-                    cb = functools.partial(
-                        ack_nack_message, ch, method.delivery_tag)
-                    connection.add_callback_threadsafe(cb)
-                except Exception as e:
-                    print(f"[!] Error processing task {task.task_id}: {e}")
-                    print(traceback.format_exc())
-
-                    # Retrieve the current retry count from message headers.
-                    retry_count = 0
-                    if properties.headers and "x-retry" in properties.headers:
-                        retry_count = properties.headers["x-retry"]
-
-                    if retry_count < 3:
-                        new_retry = retry_count + 1
-                        print(
-                            f"[!] Requeuing task {task.task_id}, attempt {new_retry}")
-                        # Create updated headers with the new retry count.
-                        new_headers = properties.headers.copy() if properties.headers else {}
-                        new_headers["x-retry"] = new_retry
-                        new_props = pika.BasicProperties(headers=new_headers)
-                        # Republish to the same queue (using queue_name from the parent scope)
-                        connection.add_callback_threadsafe(
-                            lambda: ch.basic_publish(
-                                exchange="",
-                                routing_key=queue_name,
-                                body=body,
-                                properties=new_props
-                            )
+                        f"[!] Requeuing task {task.task_id}, attempt {new_retry}")
+                    # Create updated headers with the new retry count.
+                    new_headers = properties.headers.copy() if properties.headers else {}
+                    new_headers["x-retry"] = new_retry
+                    new_props = pika.BasicProperties(headers=new_headers)
+                    # Republish to the same queue (using queue_name from the parent scope)
+                    connection.ioloop.add_callback_threadsafe(
+                        lambda: ch.basic_publish(
+                            exchange="",
+                            routing_key=queue_name,
+                            body=body,
+                            properties=new_props
                         )
-                    else:
-                        print(
-                            f"[!] Task {task.task_id} failed after {retry_count} attempts. Not requeuing.")
-
-                    # In any case, acknowledge the original message so it is removed from the queue.
-                    connection.add_callback_threadsafe(
-                        lambda: ack_nack_message(ch, method.delivery_tag)
                     )
-        finally:
-            if token:
-                context.detach(token)
+                else:
+                    print(
+                        f"[!] Task {task.task_id} failed after {retry_count} attempts. Not requeuing.")
+
+                # In any case, acknowledge the original message so it is removed from the queue.
+                connection.ioloop.add_callback_threadsafe(
+                    lambda: ack_nack_message(ch, method.delivery_tag)
+                )
+
+    def on_task_done(connection, ch, delivery_tag, task, future):
+        # process_task acks the message itself; anything it raised escaped its
+        # own error handling, so nothing was acked and the message must be nacked
+        # here or it would hold a prefetch slot until the channel dies
+        error = future.exception()
+        if error is None:
+            return
+        print(f"[!] Unhandled error processing task {task.task_id}: {error}")
+        print("".join(traceback.format_exception(
+            type(error), error, error.__traceback__)))
+        connection.ioloop.add_callback_threadsafe(functools.partial(
+            ack_nack_message, ch, delivery_tag, nack=True))
 
     def ack_nack_message(channel, delivery_tag, nack=False):
         if channel.is_open:
@@ -538,21 +601,63 @@ def listen_for_tasks(
         else:
             raise pika.exceptions.StreamLostError
 
-    # 4. Start consuming messages
-    channel.basic_qos(prefetch_count=prefetch_count)
-    on_message_callback = functools.partial(callback, connection=connection)
-    channel.basic_consume(
-        queue=queue_name,
-        on_message_callback=on_message_callback
+    # 2. Connect to RabbitMQ with an asynchronous connection so the IO loop
+    # keeps servicing the socket while tasks run on worker threads
+    def on_connection_open(connection):
+        connection.channel(on_open_callback=on_channel_open)
+
+    def on_connection_open_error(connection, err):
+        print(f"[!] Failed to connect to RabbitMQ: {err}")
+        connection_errors.append(err)
+        connection.ioloop.stop()
+
+    def on_connection_closed(connection, reason):
+        if not stopping:
+            print(f"[!] RabbitMQ connection closed: {reason}")
+            connection_errors.append(reason)
+        connection.ioloop.stop()
+
+    # 3. Make sure the queue exists (idempotent), then start consuming
+    def on_channel_open(channel):
+        channel.queue_declare(
+            queue=queue_name,
+            durable=True,
+            callback=lambda _frame: channel.basic_qos(
+                prefetch_count=prefetch_count,
+                callback=lambda _frame: start_consuming(channel)
+            )
+        )
+
+    def start_consuming(channel):
+        on_message_callback = functools.partial(
+            callback, connection=connection)
+        channel.basic_consume(
+            queue=queue_name,
+            on_message_callback=on_message_callback
+        )
+        print("[*] Listening for tasks. Press CTRL+C to exit.")
+
+    connection_errors = []
+    stopping = False
+    connection = pika.SelectConnection(
+        pika.URLParameters(rabbitmq_host),
+        on_open_callback=on_connection_open,
+        on_open_error_callback=on_connection_open_error,
+        on_close_callback=on_connection_closed
     )
 
-    print("[*] Listening for tasks. Press CTRL+C to exit.")
+    # 4. Run the IO loop until the connection goes away
     try:
-        channel.start_consuming()
+        connection.ioloop.start()
     except KeyboardInterrupt:
         print("[*] Stopping consumer...")
-        channel.stop_consuming()
-        connection.close()
+        stopping = True
+        if connection.is_open:
+            connection.close()
+            connection.ioloop.start()
+
+    if connection_errors:
+        raise pika.exceptions.AMQPConnectionError(connection_errors[-1])
 
 
 if __name__ == "__main__":
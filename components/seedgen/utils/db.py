@@ -1,7 +1,8 @@
+import functools
+
 from sqlalchemy import (
     Column,
     Integer,
-    NullPool,
     String,
     BigInteger,
     Boolean,
@@ -110,8 +111,16 @@ class Bug(Base):
     task = relationship('Task')
 
 
-def connect_database(database_url):
-    engine = create_engine(database_url, poolclass=NullPool)
+@functools.lru_cache(maxsize=None)
+def get_session_factory(database_url):
+    """
+    Return a sessionmaker bound to a pooled engine for database_url, creating
+    the engine only once per URL.
+    """
+    engine = create_engine(database_url, pool_size=8, pool_pre_ping=True)
+    return sessionmaker(bind=engine)
 
-    SessionLocal = sessionmaker(bind=engine)
+
+def connect_database(database_url):
+    SessionLocal = get_session_factory(database_url)
     return SessionLocal()
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import List
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TaskData:
     task_id: int
     task_type: str
@@ -1,5 +1,7 @@
 import logging
 import json
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
@@ -7,10 +9,18 @@ from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.trace.status import Status, StatusCode
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 import openlit
 
 from utils.redis import get_redis_client
 
+# Trace context payloads never change for a given task, so keep recently seen
+# ones in-process to avoid a Redis round-trip on every (re)delivered message.
+_TASK_SPAN_CACHE_SIZE = 4096
+_task_span_cache = OrderedDict()
+_task_context_cache = OrderedDict()
+_task_span_lock = threading.Lock()
+
 
 def init_opentelemetry(otel_endpoint: str, otel_headers: str, otel_protocol: str, service_name: str):
     logging.getLogger("opentelemetry").setLevel(logging.WARNING)
@@ -60,15 +70,49 @@ def get_task_metadata(task_id: str):
 
 
 def get_task_span(task_id: str):
+    with _task_span_lock:
+        task_span = _task_span_cache.get(task_id)
+        if task_span is not None:
+            _task_span_cache.move_to_end(task_id)
+            return task_span
+
     redis_client = get_redis_client()
     if redis_client:
         task_span = redis_client.get(f"global:trace_context:{task_id}")
         if task_span:
+            _cache_put(_task_span_cache, task_id, task_span)
             return task_span
 
     return None
 
 
+def get_task_context(task_id: str):
+    """
+    Return the parent trace Context for task_id, extracting it from the
+    Redis payload only the first time it is seen.
+    """
+    with _task_span_lock:
+        task_context = _task_context_cache.get(task_id)
+        if task_context is not None:
+            _task_context_cache.move_to_end(task_id)
+            return task_context
+
+    payload = get_task_span(task_id)
+    if not payload:
+        return None
+
+    task_context = TraceContextTextMapPropagator().extract(json.loads(payload))
+    _cache_put(_task_context_cache, task_id, task_context)
+    return task_context
+
+
+def _cache_put(cache: OrderedDict, key, value):
+    with _task_span_lock:
+        cache[key] = value
+        if len(cache) > _TASK_SPAN_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
 def propagate_crs_attributes_to_child(child_span, parent_span):
     """
     Propagate all attributes with the 'crs.' prefix from parent_span to child_span,
@@ -83,18 +127,23 @@ def propagate_crs_attributes_to_child(child_span, parent_span):
         # For some SDKs, use parent_span._attributes (private, but common in Python SDK)
         parent_attrs = getattr(parent_span, "_attributes", {})
 
-    crs_attrs = {k: v for k, v in parent_attrs.items() if k.startswith("crs.")}
-
-    # Set them on the child span if not already set
-    for k, v in crs_attrs.items():
-        if k not in child_span.attributes:
-            child_span.set_attribute(k, v)
+    # Set them on the child span in one call, skipping those already set
+    child_attrs = child_span.attributes or {}
+    crs_attrs = {k: v for k, v in parent_attrs.items()
+                 if k.startswith("crs.") and k not in child_attrs}
+    if crs_attrs:
+        child_span.set_attributes(crs_attrs)
 
 
 @contextmanager
-def start_span_with_crs_inheritance(name, **kwargs):
+def start_span_with_crs_inheritance(name, parent_context=None, **kwargs):
+    """
+    Start a span as the current span, inheriting 'crs.' attributes from its
+    parent. If parent_context is given, the span is parented to it directly
+    instead of the context that is current in this thread.
+    """
     tracer = trace.get_tracer(__name__)
-    parent_span = trace.get_current_span()
-    with tracer.start_as_current_span(name, **kwargs) as child_span:
+    parent_span = trace.get_current_span(parent_context)
+    with tracer.start_as_current_span(name, context=parent_context, **kwargs) as child_span:
         propagate_crs_attributes_to_child(child_span, parent_span)
         yield child_span
\ No newline at end of file
@@ -1,90 +1,257 @@
 #!/usr/bin/env python3
 
+import hashlib
+import json
 import os
+import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Environment provided by the base-builder container, read once at import
+SRC = os.getenv("SRC")
+PROJECT_NAME = os.getenv("PROJECT_NAME")
 
 # Path to the text file containing function_name, and path (without BITCODE_PATH prefix)
-INPUT_FILE = os.path.join(os.getenv("SRC"), "/src/slice_target_functions.txt")
+INPUT_FILE = os.path.join(SRC, "/src/slice_target_functions.txt")
 
 BITCODE_FOLDER ="42_aixcc_bitcode"
 
 # Path to your local repository (where you'll run git commands, cmake, etc.)
-PROJECT_PATH = os.path.join(os.getenv("SRC"), os.getenv("PROJECT_NAME"))
-BITCODE_PATH = os.path.join(os.getenv("SRC"), os.getenv("PROJECT_NAME"), BITCODE_FOLDER)
+PROJECT_PATH = os.path.join(SRC, PROJECT_NAME)
+BITCODE_PATH = os.path.join(PROJECT_PATH, BITCODE_FOLDER)
 
 # Exported compilers
-STATIC_TOOLS_PATH = os.path.join(os.getenv("SRC"), "analyzer/build/lib/analyzer")
+STATIC_TOOLS_PATH = os.path.join(SRC, "analyzer/build/lib/analyzer")
 
 # Path to output
 OUTPUT_DIR = os.getenv("OUT")
 
-def main():
-    # Use OUTPUT_DIR directly, since we already mounted according harness out directory in run_slice()
-    harness_output_dir = OUTPUT_DIR
-    
-    # Change directory to the repo before we begin
-    os.chdir(PROJECT_PATH)
+# Printed (followed by the harness name) when a harness of a --batch run is done;
+# SliceRunner watches for it to post-process results early
+BATCH_DONE_MARKER = "SLICE_DONE "
+# Printed instead when a harness needs the PROJECT_PATH fallback: its container
+# mounts only this harness's bitcode there, which a batch run cannot reproduce
+BATCH_SKIPPED_MARKER = "SLICE_SKIPPED "
+
+# Fixed part of the analyzer argv; --output and the bitcode files are appended per run
+ANALYZER_ARGS = (
+    STATIC_TOOLS_PATH,
+    f"--srcroot={PROJECT_PATH}",  # Update srcroot to use the correct path
+    "--callgraph=true",
+    "--slicing=true",
+    f"--multi={INPUT_FILE}",
+)
+
+# Upper bound on the number of bitcode files handed to a single llvm-nm
+# invocation; each invocation pays the LLVM context setup once
+NM_MAX_BATCH_SIZE = 256
+NM_WORKERS = os.cpu_count() or 1
+
+# Resolve llvm-nm to an absolute path so that subprocess can launch it through
+# posix_spawn (together with close_fds=False) instead of fork+exec
+LLVM_NM = shutil.which("llvm-nm") or "llvm-nm"
+
+def run_llvm_nm(bc_files):
+    """
+    Run llvm-nm once over a batch of bitcode files and return the names of
+    the defined text symbols (nm type t/T), filtering its output as it streams.
+    """
+    symbols = []
+    with subprocess.Popen(
+            [LLVM_NM, "--defined-only", "--no-demangle", *bc_files],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, close_fds=False) as proc:
+        for line in proc.stdout:
+            parts = line.split()
+            if len(parts) >= 3 and parts[1] in (b"t", b"T"):
+                symbols.append(parts[2])
+    return symbols
+
+def find_bc_files(search_path):
+    """
+    Return the paths of all .bc files under search_path, walking the tree once
+    with os.scandir (directory symlinks are not followed, as with find).
+    """
+    bc_files = []
+    stack = [search_path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".bc") and entry.is_file():
+                    bc_files.append(entry.path)
+    return bc_files
+
+def cached_function_set_count(bc_files, function_set_file, digest):
+    """
+    Return the symbol count recorded next to function_set_file if it was
+    generated from exactly these bitcode files (digest of the sorted list) and
+    none of them was modified since; otherwise None.
+    """
+    try:
+        with open(function_set_file + ".meta") as f:
+            meta_digest, count = f.read().split()
+        generated = os.stat(function_set_file).st_mtime
+        if meta_digest != digest or any(os.stat(p).st_mtime > generated for p in bc_files):
+            return None
+        return int(count)
+    except (OSError, ValueError):
+        return None
+
+def collect_function_set(bc_files, function_set_file):
+    """
+    Write the defined text symbols of the given .bc files to function_set_file,
+    running llvm-nm over batches of files in parallel.
+    Each symbol is written once, however many files define it.
+    The set is reused as is when the bitcode inputs are unchanged since it was
+    last generated (tracked in a sibling .meta file).
+    Returns the number of symbols written.
+    """
+    digest = hashlib.sha256("\0".join(sorted(bc_files)).encode()).hexdigest()
+    count = cached_function_set_count(bc_files, function_set_file, digest)
+    if count is not None:
+        print(f"Reusing {function_set_file} ({count} symbols)")
+        return count
+
+    # Use as few llvm-nm processes as possible while still keeping every worker busy
+    batch_size = max(1, min(NM_MAX_BATCH_SIZE, -(-len(bc_files) // NM_WORKERS)))
+    batches = [bc_files[i:i + batch_size] for i in range(0, len(bc_files), batch_size)]
+
+    seen = set()
+    with open(function_set_file, "wb") as out, \
+            ThreadPoolExecutor(max_workers=NM_WORKERS) as executor:
+        for symbols in executor.map(run_llvm_nm, batches):
+            for symbol in symbols:
+                if symbol not in seen:
+                    seen.add(symbol)
+                    out.write(symbol + b"\n")
+    with open(function_set_file + ".meta", "w") as f:
+        f.write(f"{digest} {len(seen)}\n")
+    return len(seen)
+
+def copy_file(src, dst):
+    """Copy a regular file with copy_file_range so the data stays in the kernel."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                pass
+        except OSError:
+            # e.g. EXDEV/ENOSYS on older kernels or filesystems: plain copy instead
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst)
+
+def copy_tree_contents(src_dir, dst_dir):
+    """
+    Copy the (non-hidden) contents of src_dir into dst_dir, like
+    `mkdir -p dst_dir && cp -r src_dir/* dst_dir/`. Symlinks are recreated
+    rather than followed.
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    stack = [(src_dir, dst_dir, True)]
+    while stack:
+        cur_src, cur_dst, top_level = stack.pop()
+        with os.scandir(cur_src) as it:
+            for entry in it:
+                if top_level and entry.name.startswith("."):
+                    continue
+                target = os.path.join(cur_dst, entry.name)
+                if entry.is_symlink():
+                    if os.path.lexists(target):
+                        os.remove(target)
+                    os.symlink(os.readlink(entry.path), target)
+                elif entry.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    stack.append((entry.path, target, False))
+                else:
+                    copy_file(entry.path, target)
+
+def slice_harness(bitcode_path, harness_output_dir, work_dir=None, allow_fallback=True):
+    """
+    Slice one harness: collect its function set, save its bitcode and run the
+    analyzer over it, writing everything into harness_output_dir. The analyzer
+    drops scratch files into its working directory, so concurrent runs get their
+    own work_dir.
+    Returns False, without slicing, if the harness bitcode defines no symbols and
+    allow_fallback is False; True otherwise.
+    """
     try:
         # 1. Collect complete function set
         function_set_file = os.path.join(harness_output_dir, "complete_function_set.txt")
         
-        # First try BITCODE_PATH
-        find_command = (
-            f"find {BITCODE_PATH} -name '*.bc' "
-            f"-exec llvm-nm --defined-only --no-demangle {{}} \\; | "
-            f"grep -E ' [tT] ' | awk '{{print $3}}' > {function_set_file}"
-        )
-        result = subprocess.run(find_command, shell=True, capture_output=True)
-        
-        # If no .bc files found in BITCODE_PATH, try PROJECT_PATH
-        if result.returncode != 0 or not os.path.getsize(function_set_file):
-            find_command = (
-                f"find {PROJECT_PATH} -name '*.bc' "
-                f"-exec llvm-nm --defined-only --no-demangle {{}} \\; | "
-                f"grep -E ' [tT] ' | awk '{{print $3}}' > {function_set_file}"
-            )
-            subprocess.run(find_command, shell=True, check=True)
+        # First try bitcode_path, then fall back to PROJECT_PATH if no symbols were found.
+        # The bitcode list is reused for the analyzer below.
+        search_path = bitcode_path
+        bc_files = find_bc_files(search_path)
+        if not collect_function_set(bc_files, function_set_file):
+            if not allow_fallback:
+                return False
             search_path = PROJECT_PATH
-        else:
-            search_path = BITCODE_PATH
+            bc_files = find_bc_files(search_path)
+            collect_function_set(bc_files, function_set_file)
 
         # Save bitcode files to harness_output_dir
         bitcode_output_dir = os.path.join(harness_output_dir, BITCODE_FOLDER)
-        copy_command = f"mkdir -p {bitcode_output_dir} && cp -r {search_path}/* {bitcode_output_dir}/"
         print(f"Copying {search_path} to {bitcode_output_dir}")
         try:
-            subprocess.run(copy_command, shell=True, check=True)
+            copy_tree_contents(search_path, bitcode_output_dir)
             print(f"Successfully copied {search_path} to {bitcode_output_dir}")
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             print(f"Error copying {search_path} to {bitcode_output_dir}: {e}")
         
         # 2. Build the analyzer command:
-        found_files_cmd = ["find", search_path, "-name", "*.bc"]
-        found_files = subprocess.check_output(found_files_cmd).decode("utf-8").split()
-
-        analyzer_cmd = [
-            f"{STATIC_TOOLS_PATH}",
-            f"--srcroot={PROJECT_PATH}",  # Update srcroot to use the correct path
-            "--callgraph=true",
-            "--slicing=true",
-            f"--output={harness_output_dir}",
-            f"--multi={INPUT_FILE}"
-        ]
-        analyzer_cmd.extend(found_files)
+        analyzer_cmd = [*ANALYZER_ARGS, f"--output={harness_output_dir}", *bc_files]
 
         # 3. Run the analyzer command
-        subprocess.run(analyzer_cmd, check=True)
+        subprocess.run(analyzer_cmd, check=True, close_fds=False, cwd=work_dir)
 
         # Print completion message
-        print("Completed analysis using output directory")
+        print(f"Completed analysis using output directory {harness_output_dir}")
 
     except subprocess.CalledProcessError as e:
         print(f"Error: {e}. Skipping...\n")
+    return True
+
+def slice_batch(harness_list_file):
+    """
+    Slice every harness listed in harness_list_file (JSON list of {"name",
+    "bitcode", "out"} container paths) in this one process, up to
+    MAX_PARALLEL_SLICES harnesses at a time.
+    """
+    with open(harness_list_file) as f:
+        harnesses = json.load(f)
+    workers = max(1, min(len(harnesses), int(os.getenv("MAX_PARALLEL_SLICES", "1"))))
+
+    def run(harness):
+        print(f"Slicing harness {harness['name']}")
+        if not slice_harness(harness["bitcode"], harness["out"], tempfile.mkdtemp(prefix=f"slice-{harness['name']}-"), allow_fallback=False):
+            # The runner slices it in a container of its own
+            print(f"{BATCH_SKIPPED_MARKER}{harness['name']}", flush=True)
+            return
+        # Lets the runner post-process this harness while the others are still running
+        print(f"{BATCH_DONE_MARKER}{harness['name']}", flush=True)
 
-    finally:
-        # Return to the repository root
-        os.chdir(PROJECT_PATH)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(run, harnesses))
+
+def main():
+    # Change directory to the repo before we begin
+    os.chdir(PROJECT_PATH)
+
+    # Batch mode: one container slices all harnesses (see SliceRunner.run_slice)
+    if len(sys.argv) > 2 and sys.argv[1] == "--batch":
+        slice_batch(sys.argv[2])
+        return
+
+    # Use OUTPUT_DIR directly, since we already mounted according harness out directory in run_slice()
+    slice_harness(BITCODE_PATH, OUTPUT_DIR)
         
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,7 @@
 import os
 import argparse
 import logging
-import time
+import signal
 import shutil
 
 from mock.mockconfig import set_mock_env
@@ -86,10 +86,17 @@ if __name__ == '__main__':
         logging.error('Failed to connect to message queue: %s', e)
         exit(1)
         
+    # stop consuming on SIGTERM
+    signal.signal(signal.SIGTERM, lambda *_: msg_queue.stop())
+
     # start directed daemon
     logging.info('Starting Slice daemon')
     directed_daemon = SliceDaemon(msg_queue, DEBUG, MOCK)
 
-    # wait for new task
-    while True:
-        time.sleep(10)
\ No newline at end of file
+    # consume new tasks until shutdown
+    try:
+        directed_daemon.run()
+    except Exception as e:
+        logging.error('Slice daemon stopped: %s', e)
+        exit(1)
+    logging.info('Shutting down Slice daemon')
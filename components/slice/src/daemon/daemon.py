@@ -8,14 +8,15 @@ import shutil
 import os
 import tarfile
 import docker
+from concurrent.futures import ThreadPoolExecutor
 
 from config.config import Config
 from daemon.modules.patchrunner import PatchManager
 from daemon.modules.slicerunner import SliceRunner
 from daemon.modules.workspace import WorkspaceManager
-from utils.thread import ExceptionThread
+from utils.misc import link_tree
 from utils.docker_slice import _env_to_docker_args, docker_run
-from daemon.modules.telemetry import create_span, set_span_status, log_event, span_decorator, extract_span_context, get_current_span
+from daemon.modules.telemetry import create_span, set_span_status, log_event, span_decorator, extract_span_context, get_current_span, flush_telemetry
 
 from db.db import DBConnection
 from daemon.slice_msg import SliceMsg
@@ -28,21 +29,17 @@ class SliceDaemon:
         self.tasks = []
         self.task_lock = threading.Lock()
         self.msg_queue = msg_queue
-        self.task_thread = ExceptionThread(target=self._task_thread)
-        self.task_thread.start()
+        # Shared by all consumer threads; created on first use
+        self.db_connection = None
+        self.db_lock = threading.Lock()
         self.task_retries = {}  # Track retry counts for each task
         self.max_retries = int(os.getenv('MAX_RETRIES', 3))  # Get max retries from env or use default
 
-    def _task_thread(self):
-        # start consume the message queue
-        while True:
-            try:
-                # self.msg_queue.consume(self._on_message)
-                self.msg_queue.threaded_consume(self._on_message)
-            except Exception as e:
-                logging.error('Failed to consume message: %s', e)
-                # time.sleep(10)
-                exit(1)
+    def run(self):
+        # consume the message queue in the calling thread until stopped; slice tasks
+        # run on the queue's worker pool, connection failures propagate to the caller
+        logging.info('Start consuming slice tasks')
+        self.msg_queue.select_consume(self._on_message)
 
     def _on_message(self, ch, method, properties, body):
         logging.info('New message received')
@@ -93,8 +90,7 @@ class SliceDaemon:
                     "retry_count": self.task_retries[msg.task_id]
                 })
                 
-                db_connection = DBConnection(db_url=os.getenv('DATABASE_URL'))
-                empty_result_path = self._prepare_empty_result(msg)
+                db_connection = self._get_db_connection()
                 
                 # If max retries reached, use empty result and don't attempt processing
                 if self.task_retries[msg.task_id] > self.max_retries:
@@ -102,7 +98,8 @@ class SliceDaemon:
                         "task_id": msg.task_id,
                         "max_retries": self.max_retries
                     })
-                    result_path = empty_result_path
+                    # Only touch storage for the empty result when it is actually published
+                    result_path = self._prepare_empty_result(msg)
                 else:
                     try:
                         result_path = self._process_slice(msg, root_span)
@@ -127,6 +124,12 @@ class SliceDaemon:
                 set_span_status(root_span, "ERROR", str(e))
                 raise
     
+    def _get_db_connection(self):
+        with self.db_lock:
+            if self.db_connection is None:
+                self.db_connection = DBConnection(db_url=os.getenv('DATABASE_URL'))
+            return self.db_connection
+
     def _parse_message(self, body):
         try:
             msg = SliceMsg(**json.loads(body))
@@ -141,21 +144,17 @@ class SliceDaemon:
         if not crs_storage_dir:
             return None
             
-        if not Path(crs_storage_dir).exists():
-            Path(crs_storage_dir).mkdir(parents=True, exist_ok=True)
-        
-        # Use a fixed directory for empty results
-        worker_sliceout_dir = Path(crs_storage_dir) / 'slice_results' / 'FAIL-FAIL-FAIL-FAIL-FAIL-FAIL'
-        worker_sliceout_dir.mkdir(parents=True, exist_ok=True)
+        # Use a fixed directory for empty results (makedirs also creates STORAGE_DIR)
+        worker_sliceout_dir = os.path.join(crs_storage_dir, 'slice_results', 'FAIL-FAIL-FAIL-FAIL-FAIL-FAIL')
+        os.makedirs(worker_sliceout_dir, exist_ok=True)
         
         # Create empty result file based on slice type
-        empty_result_path = worker_sliceout_dir / ('result_sarif' if msg.is_sarif else 'result_directed')
+        empty_result_path = os.path.join(worker_sliceout_dir, 'result_sarif' if msg.is_sarif else 'result_directed')
         
-        # Create file with FAIL content
-        with open(empty_result_path, 'w') as f:
-            f.write('')
+        # Create (or truncate) the file in a single open
+        os.close(os.open(empty_result_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644))
             
-        return empty_result_path
+        return Path(empty_result_path)
     
     def _process_slice(self, msg, span):
         # create workspace for the task
@@ -171,20 +170,31 @@ class SliceDaemon:
             project_name = msg.project_name
             slice_target = msg.slice_target
 
-            # Patch the focused repo with the diff.
             patcher = PatchManager(workspace)
-            if patcher.diff_path is not None and not patcher.apply_patch():
-                logging.error("Failed to apply patch to the focused repo.")
-                raise ValueError("Failed to apply patch to the focused repo")
-
-            # Instantiate and prepare the SliceRunner.
             runner = SliceRunner(project_name, workspace, slice_target, span=span)
-            if not runner.prepare():
+
+            # Patch the focused repo with the diff while the project image is checked
+            # (or built); the image does not depend on the repo contents.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                patch_future = executor.submit(patcher.apply_patch) if patcher.diff_path is not None else None
+                image_ready = runner.prepare_image()
+                if patch_future is not None and not patch_future.result():
+                    logging.error("Failed to apply patch to the focused repo.")
+                    raise ValueError("Failed to apply patch to the focused repo")
+
+            # Build the fuzzers from the patched repo.
+            if not image_ready or not runner.prepare(image_ready=True):
                 logging.error("SliceRunner preparation failed for project %s", project_name)
                 raise ValueError(f"SliceRunner preparation failed for project {project_name}")
 
             # Run the slice analysis for all harnesses
-            if not runner.run_slice():
+            try:
+                slice_ok = runner.run_slice()
+            finally:
+                # Actions are exported in the background; don't let them lag behind
+                # the task that produced them
+                flush_telemetry()
+            if not slice_ok:
                 logging.error("Slice analysis failed for all harnesses in project %s", project_name)
                 raise ValueError(f"Slice analysis failed for all harnesses in project {project_name}")
             
@@ -194,7 +204,7 @@ class SliceDaemon:
             crs_storage_dir = os.getenv('STORAGE_DIR')
             if crs_storage_dir:
                 worker_sliceout_dir = Path(crs_storage_dir) / 'slice_results' / str(workspace.worker_id)
-                shutil.copytree(runner.slice_out, worker_sliceout_dir)
+                link_tree(runner.slice_out, worker_sliceout_dir)
                 
                 result_file_name = 'merged_slice_result.txt'
                 
@@ -1,10 +1,32 @@
+import os
 import re
+import mmap
+import shutil
+import functools
 import logging
 import subprocess
 from pathlib import Path
 
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
 from daemon.modules.workspace import WorkspaceManager
 
+PATCH_BIN = shutil.which("patch") or "patch"
+
+# Byte-level scanners run directly over the mmapped diff by analyze_patch:
+# hunk header lines, and maximal runs of consecutive added ('+', not '+++') lines.
+_HUNK_LINE_RE = re.compile(rb'^@@[^\n]*', re.MULTILINE)
+_ADDED_RUN_RE = re.compile(rb'^(?:\+(?!\+\+)[^\n]*(?:\n|\Z))+', re.MULTILINE)
+_ADDED_LINE_RE = re.compile(rb'\+([^\n]*\n?)')
+
+# Function name extraction from hunk headers, signatures and accumulated added code.
+_HUNK_HEADER_RE = re.compile(r"@@.*@@\s*(.*)")
+_SIGNATURE_RE = re.compile(r'([A-Za-z_]\w*)\s*\(')
+_FUNCTION_DEF_RE = re.compile(r'^\s*(?:[\w\*\s]+)\s+([A-Za-z_]\w*)\s*\([^;{]*\)\s*\{', re.DOTALL)
+
 class PatchManager:
     def __init__(self, workspace_manager: WorkspaceManager):
         """
@@ -14,6 +36,11 @@ class PatchManager:
             workspace_manager (WorkspaceManager): An instance managing your workspace.
         """
         self.workspace_manager = workspace_manager
+
+        # The workspace diff is opened and mapped once, on first use, and shared by
+        # analyze_patch and apply_patch (see _map_diff).
+        self._diff_fd = None
+        self._diff_mm = None
         
         # Retrieve the focused repository from the workspace.
         focused_repo = self.workspace_manager.get_focused_repo()
@@ -27,12 +54,43 @@ class PatchManager:
             self.diff_path = self.workspace_manager.diff_path
         self.focused_repo = Path(focused_repo)
 
+    def close(self):
+        """
+        Releases the shared mapping and descriptor of the workspace diff, if open.
+        """
+        if self._diff_mm is not None:
+            if isinstance(self._diff_mm, mmap.mmap):
+                self._diff_mm.close()
+            self._diff_mm = None
+        if self._diff_fd is not None:
+            os.close(self._diff_fd)
+            self._diff_fd = None
+
+    def __del__(self):
+        self.close()
+
+    def _is_workspace_diff(self, diff_file):
+        return diff_file is None or (self.diff_path is not None and Path(diff_file) == Path(self.diff_path))
+
+    def _map_diff(self):
+        """
+        Opens and maps the workspace diff on first call and returns the mapping
+        (b'' for an empty diff, which cannot be mapped).
+        """
+        if self._diff_mm is None:
+            self._diff_fd = os.open(self.diff_path, os.O_RDONLY)
+            if os.fstat(self._diff_fd).st_size == 0:
+                self._diff_mm = b''
+            else:
+                self._diff_mm = mmap.mmap(self._diff_fd, 0, access=mmap.ACCESS_READ)
+        return self._diff_mm
+
     def extract_function_from_hunk_header(self, line):
         """
         Given a diff hunk header line, attempt to extract the function signature,
         then extract the function name.
         """
-        m = re.match(r"@@.*@@\s*(.*)", line)
+        m = _HUNK_HEADER_RE.match(line)
         if m:
             signature = m.group(1).strip()
             if signature:
@@ -44,7 +102,7 @@ class PatchManager:
         Extracts the function name from a signature.
         E.g., "static int my_function(int a, int b)" → "my_function"
         """
-        m = re.search(r'([A-Za-z_]\w*)\s*\(', signature)
+        m = _SIGNATURE_RE.search(signature)
         if m:
             return m.group(1)
         return None
@@ -53,12 +111,21 @@ class PatchManager:
         """
         When added code spans multiple lines, attempt to extract a complete function definition.
         """
-        pattern = re.compile(r'^\s*(?:[\w\*\s]+)\s+([A-Za-z_]\w*)\s*\([^;{]*\)\s*\{', re.DOTALL)
-        m = pattern.search(accum)
+        m = _FUNCTION_DEF_RE.search(accum)
         if m:
             return m.group(1)
         return None
 
+    @functools.cached_property
+    def changed_functions(self):
+        """
+        Function names changed by the workspace diff. The diff is only scanned on
+        first access, so applying a patch never pays for the analysis.
+        """
+        if self.diff_path is None:
+            return set()
+        return self.analyze_patch()
+
     def analyze_patch(self, diff_file=None):
         """
         Analyzes the diff file and returns a set of function names that appear to be changed.
@@ -70,56 +137,58 @@ class PatchManager:
         Returns:
             set: A set of function names extracted from the diff.
         """
-        if diff_file is None:
-            diff_file = self.diff_path
-
         changed_functions = set()
         try:
-            with open(diff_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            if self._is_workspace_diff(diff_file):
+                self._scan_diff(self._map_diff(), changed_functions)
+            else:
+                with open(diff_file, 'rb') as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        return changed_functions
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        self._scan_diff(mm, changed_functions)
         except Exception as e:
             logging.error("Error reading diff file: %s", e)
-            return changed_functions
-
-        accum = ""
-        accumulating = False
-        for line in lines:
-            if line.startswith("@@"):
-                func = self.extract_function_from_hunk_header(line)
-                if func:
-                    changed_functions.add(func)
-                # End accumulation when a new hunk header is reached.
-                if accum:
-                    new_func = self.extract_function_from_accumulation(accum)
-                    if new_func:
-                        changed_functions.add(new_func)
-                    accum = ""
-                    accumulating = False
-            elif line.startswith('+') and not line.startswith("+++"):
-                content = line[1:]  # Remove the '+' diff marker.
-                accum += content
-                accumulating = True
-                # If accumulated text seems complete, try to extract a function.
-                if '{' in content and ')' in accum:
-                    new_func = self.extract_function_from_accumulation(accum)
-                    if new_func:
-                        changed_functions.add(new_func)
-                        accum = ""
-                        accumulating = False
-            else:
-                if accumulating and accum:
-                    new_func = self.extract_function_from_accumulation(accum)
-                    if new_func:
-                        changed_functions.add(new_func)
-                    accum = ""
-                    accumulating = False
-        # Check for any trailing accumulated text.
-        if accumulating and accum:
-            new_func = self.extract_function_from_accumulation(accum)
-            if new_func:
-                changed_functions.add(new_func)
         return changed_functions
 
+    def _scan_diff(self, diff_data, changed_functions):
+        """
+        Collects function names from the hunk headers and added lines of diff_data.
+        """
+        for m in _HUNK_LINE_RE.finditer(diff_data):
+            func = self.extract_function_from_hunk_header(
+                m.group(0).decode('utf-8', errors='replace'))
+            if func:
+                changed_functions.add(func)
+        for m in _ADDED_RUN_RE.finditer(diff_data):
+            self._collect_added_functions(diff_data, m.start(), m.end(), changed_functions)
+
+    def _collect_added_functions(self, diff_data, start, end, changed_functions):
+        """
+        Accumulates the run of consecutive added lines in diff_data[start:end] and
+        extracts any function definitions from it. Accumulation restarts after each
+        extracted definition and ends with the run (i.e. at the next non-added line
+        or hunk header). Lines are streamed out of diff_data one at a time.
+        """
+        accum = []
+        has_paren = False
+        for line in _ADDED_LINE_RE.finditer(diff_data, start, end):
+            content = line.group(1)  # Without the '+' diff marker.
+            accum.append(content)
+            has_paren = has_paren or b')' in content
+            if b'{' not in content:
+                continue
+            # A definition match has to end at the first '{' of the accumulated text,
+            # so this is the only attempt that can succeed: if it fails, nothing later
+            # in the run can match either and the rest of the run is skipped.
+            new_func = has_paren and self.extract_function_from_accumulation(
+                b''.join(accum).decode('utf-8', errors='replace'))
+            if not new_func:
+                return
+            changed_functions.add(new_func)
+            accum.clear()
+            has_paren = False
+
     def apply_patch(self, patch_file = None):
         """
         Applies the given patch file to the focused repository.
@@ -130,14 +199,27 @@ class PatchManager:
         Returns:
             bool: True if the patch was applied successfully; False otherwise.
         """
+        shared = self._is_workspace_diff(patch_file)
         if patch_file is None:
             patch_file = self.diff_path
 
+        if self._apply_patch_in_process(patch_file, shared):
+            logging.info("Patch applied successfully.")
+            return True
+
         try:
-            cmd = ["patch", "-p1", "-i", str(patch_file)]
-            # Run the patch command in the directory of the focused repo.
-            result = subprocess.run(cmd, cwd=str(self.focused_repo),
-                                    capture_output=True, text=True)
+            # Let patch change into the focused repo itself (-d) and use an absolute
+            # executable path, so subprocess can take the posix_spawn fast path.
+            cmd = [PATCH_BIN, "-d", str(self.focused_repo), "-p1"]
+            if shared:
+                # Hand patch the descriptor we already hold instead of reopening the diff
+                self._map_diff()
+                os.lseek(self._diff_fd, 0, os.SEEK_SET)
+                stdin = self._diff_fd
+            else:
+                cmd += ["-i", str(Path(patch_file).resolve())]
+                stdin = None
+            result = subprocess.run(cmd, stdin=stdin, capture_output=True, text=True, close_fds=False)
             if result.returncode != 0:
                 logging.exception("Error applying patch < %s | %s >: %s", str(patch_file), str(self.focused_repo), result.stdout)
                 return False
@@ -146,3 +228,30 @@ class PatchManager:
         except Exception as e:
             logging.exception("Exception applying patch: %s", e)
             return False
+
+    def _apply_patch_in_process(self, patch_file, shared=False):
+        """
+        Applies the patch to the focused repository's working tree through libgit2,
+        avoiding a fork/exec of the patch binary. Only used when pygit2 is available
+        and the focused repository is itself the root of a git checkout.
+        
+        Returns:
+            bool: True if libgit2 applied the patch; False if the caller should fall
+            back to the patch binary.
+        """
+        if pygit2 is None:
+            return False
+        try:
+            repo_path = pygit2.discover_repository(str(self.focused_repo))
+            if repo_path is None:
+                return False
+            repo = pygit2.Repository(repo_path)
+            if repo.workdir is None or Path(repo.workdir).resolve() != self.focused_repo.resolve():
+                return False
+            diff_data = self._map_diff()[:] if shared else Path(patch_file).read_bytes()
+            diff = pygit2.Diff.parse_diff(diff_data)
+            repo.apply(diff, pygit2.GIT_APPLY_LOCATION_WORKDIR)
+            return True
+        except (pygit2.GitError, ValueError, OSError) as e:
+            logging.warning("libgit2 could not apply patch %s, falling back to patch: %s", str(patch_file), e)
+            return False
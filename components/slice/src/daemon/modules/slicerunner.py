@@ -1,17 +1,91 @@
 import os
+import sys
+import json
+import asyncio
+import shutil
 import logging
+import queue
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import docker
 from daemon.modules.workspace import WorkspaceManager
 from utils.docker_slice import _env_to_docker_args, docker_run
-from daemon.modules.telemetry import log_telemetry_action, span_decorator
+from utils.bitcode import read_source_filename
+from utils.misc import link_or_copy
+from daemon.modules.telemetry import log_telemetry_action, span_decorator, create_span, set_span_status
 
 BITCODE_FOLDER ="42_aixcc_bitcode"
 
+# Upper bound on concurrent llvm-nm/llvm-dis processes while scanning for harnesses
+SCAN_CONCURRENCY = (os.cpu_count() or 1) * 2
+# Files per llvm-nm invocation when looking for harnesses (keeps argv well below ARG_MAX)
+NM_BATCH_SIZE = 512
+HARNESS_SYMBOL = b'LLVMFuzzerTestOneInput'
+# Dependent BC files are hard linked into the harness directories instead of copied
+USE_HARDLINKS = os.getenv('SLICE_USE_HARDLINKS', '1') != '0'
+# Printed by slice.py --batch, followed by the harness name, when a harness is done
+BATCH_DONE_MARKER = 'SLICE_DONE '
+# ... or when it was left out because it needs the project-wide bitcode fallback,
+# which only a per-harness container reproduces
+BATCH_SKIPPED_MARKER = 'SLICE_SKIPPED '
+
+async def _run_tool(*cmd, check=True):
+    """
+    Runs a command without blocking the event loop and returns its raw stdout bytes;
+    callers decode only the parts they need.
+    Raises subprocess.CalledProcessError on a non-zero exit, like check=True;
+    with check=False the failure is only logged.
+    """
+    # fds opened by Python are non-inheritable (PEP 446), so skipping close_fds is
+    # safe; it spares the child the fd sweep and lets subprocess use posix_spawn.
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, close_fds=False)
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        if check:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+        logging.error(f"{cmd[0]} exited with status {proc.returncode}: {stderr.decode(errors='replace').strip()}")
+    return stdout
+
+def _read_entries(path):
+    """
+    Returns an iterator over the stripped, non-empty lines of a result file. The file
+    is read and split in one go; set.update() consumes the iterator directly.
+    Entries are interned since the same function names repeat across many files.
+    """
+    return map(sys.intern, filter(None, map(str.strip, Path(path).read_text().splitlines())))
+
+def _write_entries(path, entries):
+    """
+    Writes entries sorted, one per line, with a single write. The text is encoded
+    once up front so the file is written as raw bytes.
+    """
+    text = "\n".join(sorted(entries))
+    Path(path).write_bytes((text + "\n" if text else text).encode())
+
+def _iter_files(root, suffix):
+    """
+    Recursively yields the paths (as str) of files under root whose name ends with suffix,
+    walking with os.scandir so file types come from the cached directory entries.
+    Symlinked directories are not followed.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(suffix):
+                    yield entry.path
+
 class SliceRunner:
-    def __init__(self, project_name, workspace_manager: WorkspaceManager, slice_target, span, image_prefix='aixcc-afc'):
+    # One Docker client (and its connection pool) shared by all runners
+    _docker_client = None
+    _docker_client_lock = threading.Lock()
+
+    def __init__(self, project_name, workspace_manager: WorkspaceManager, slice_target, span, image_prefix='aixcc-afc', slice_cache_mounts=None):
         """
         Initializes the SliceRunner with the given parameters.
 
@@ -20,6 +94,9 @@ class SliceRunner:
             workspace_manager (WorkspaceManager): An instance of WorkspaceManager.
             slice_target (list): List of (path, func) tuples for slice targets.
             image_prefix (str): Docker image prefix/registry (default: 'aixcc-afc')
+            slice_cache_mounts (list): Container paths (e.g. '/root/.cache/pip') to back with
+                cache directories that persist across tasks. Defaults to the comma-separated
+                SLICE_CACHE_MOUNTS env var; none when unset.
         """
         self.project_name = project_name
         self.workspace_manager = workspace_manager
@@ -42,24 +119,86 @@ class SliceRunner:
         self.slice_work = self.workspace_dir / 'slice_work'
         self.slice_out.mkdir(exist_ok=True)
         self.slice_work.mkdir(exist_ok=True)
+
+        # Persistent caches live next to the per-task workspaces, so every task (and
+        # every harness container) reuses them.
+        if slice_cache_mounts is None:
+            slice_cache_mounts = [p for p in os.getenv('SLICE_CACHE_MOUNTS', '').split(',') if p]
+        cache_root = self.workspace_manager.base_dir / 'slice_cache'
+        self.cache_mount_args = []
+        for container_path in slice_cache_mounts:
+            host_dir = cache_root / container_path.strip('/').replace('/', '_')
+            host_dir.mkdir(parents=True, exist_ok=True)
+            self.cache_mount_args += ['-v', f'{host_dir}:{container_path}']
         
         self.helper_path = self.workspace_manager.helper_path
-        self.docker_client = docker.from_env()
+        self.docker_client = self._shared_docker_client()
         self.current_span = span
+        self._harness_future = None  # Set by prepare() once the fuzzers are built
+
+    @classmethod
+    def _shared_docker_client(cls):
+        """
+        Returns the Docker client shared by all runners, creating it on first use.
+        """
+        with cls._docker_client_lock:
+            if cls._docker_client is None:
+                cls._docker_client = docker.from_env()
+            return cls._docker_client
 
     @span_decorator("prepare")
-    def prepare(self):
+    def prepare(self, image_ready=False):
         """
         Prepare the environment by building the Docker image and fuzzers.
+        Args:
+            image_ready (bool): Skip the image step, the caller already ran prepare_image().
         Returns:
             bool: True if preparation is successful, False otherwise.
         """
-        if not self._build_docker_image():
-            logging.error(f"Failed to build Docker image for project '{self.project_name}'")
+        if not image_ready and not self.prepare_image():
             return False
         if not self._build_fuzzers():
             logging.error(f"Failed to build fuzzers for project '{self.project_name}'")
             return False
+        # The harness scan only needs the bitcode the fuzzer build just produced, so
+        # start it now; run_slice collects it after its own setup.
+        self._harness_future = self._start_prepare_harnesses()
+        return True
+
+    def _start_prepare_harnesses(self):
+        """
+        Runs prepare_harnesses in a background thread and returns its future.
+        span_decorator keeps the current span on self, which is not thread-safe, so the
+        worker runs the undecorated method under its own child span instead.
+        """
+        parent_span = self.current_span
+
+        def scan():
+            with create_span("Slice-14 prepare_harnesses", parent_span=parent_span) as span:
+                try:
+                    harness_dirs = SliceRunner.prepare_harnesses.__wrapped__(self)
+                except Exception as e:
+                    set_span_status(span, "ERROR", description=str(e))
+                    raise
+                set_span_status(span, "OK" if harness_dirs else "ERROR")
+                return harness_dirs
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prepare-harnesses')
+        future = executor.submit(scan)
+        # Lets the worker thread exit once the scan is done
+        executor.shutdown(wait=False)
+        return future
+
+    def prepare_image(self):
+        """
+        Make sure a usable Docker image exists for the project. The image does not
+        depend on the focused repo, so this can run while the repo is being patched.
+        Returns:
+            bool: True if an image is available, False otherwise.
+        """
+        if not self._build_docker_image():
+            logging.error(f"Failed to build Docker image for project '{self.project_name}'")
+            return False
         return True
 
     @span_decorator("build_docker_image")
@@ -75,42 +214,29 @@ class SliceRunner:
         legacy_image_name = f'gcr.io/oss-fuzz/{self.project_name}'
         log_telemetry_action(title=f"Checking for existing Docker image for project '{self.project_name}'", msg_list=[], action_name="build_docker_image", status="OK", level="info")
         
-        # 1. Check for existing standard image
+        # 1./2. Check for an existing standard, then legacy image
         try:
-            self.docker_client.images.get(image_name)
-            logging.info("Using existing standard Docker image '%s'.", image_name)
-            self.effective_image_name = image_name
-            log_telemetry_action(title="Check for existing standard image", msg_list=[f"Using existing standard Docker image '{image_name}'."], action_name="build_docker_image", status="OK", level="verbose")
-            return True
-        except docker.errors.ImageNotFound:
-            logging.debug("Standard Docker image '%s' not found.", image_name)
-            log_telemetry_action(title="Check for existing standard image", msg_list=[f"Standard Docker image '{image_name}' not found."], action_name="build_docker_image", status="ERROR", level="debug")
+            existing = self._find_existing_image([image_name, legacy_image_name])
         except Exception as e:
-             logging.error("Error checking for standard image '%s': %s", image_name, e)
-             # Potentially recoverable, continue to check legacy
-             log_telemetry_action(title="Check for existing standard image", msg_list=[f"Error checking for standard image '{image_name}': {e}"], action_name="build_docker_image", status="ERROR", level="debug")
-        # 2. Check for existing legacy image
-        try:
-            self.docker_client.images.get(legacy_image_name)
-            logging.info("Using existing legacy Docker image '%s'.", legacy_image_name)
-            self.effective_image_name = legacy_image_name
-            log_telemetry_action(title="Check for existing legacy image", msg_list=[f"Using existing legacy Docker image '{legacy_image_name}'."], action_name="build_docker_image", status="OK", level="verbose")
+            logging.error("Error checking for existing images '%s'/'%s': %s", image_name, legacy_image_name, e)
+            log_telemetry_action(title="Check for existing images", msg_list=[f"Error checking for images '{image_name}'/'{legacy_image_name}': {e}"], action_name="build_docker_image", status="ERROR", level="debug")
+            return False
+        if existing:
+            kind = "standard" if existing == image_name else "legacy"
+            logging.info("Using existing %s Docker image '%s'.", kind, existing)
+            self.effective_image_name = existing
+            log_telemetry_action(title=f"Check for existing {kind} image", msg_list=[f"Using existing {kind} Docker image '{existing}'."], action_name="build_docker_image", status="OK", level="verbose")
             return True
-        except docker.errors.ImageNotFound:
-            logging.info("Neither standard nor legacy Docker image found. Attempting build.")
-            log_telemetry_action(title="Check for existing legacy image", msg_list=[f"Neither standard nor legacy Docker image found. Attempting build."], action_name="build_docker_image", status="ERROR", level="debug")
-        except Exception as e:
-             logging.error("Error checking for legacy image '%s': %s", legacy_image_name, e)
-             # If standard check also failed, we probably can't proceed
-             if self.effective_image_name is None:
-                 return False
-             log_telemetry_action(title="Check for existing legacy image", msg_list=[f"Error checking for legacy image '{legacy_image_name}': {e}"], action_name="build_docker_image", status="ERROR", level="debug")
+        logging.info("Neither standard nor legacy Docker image found. Attempting build.")
+        log_telemetry_action(title="Check for existing images", msg_list=[f"Neither standard nor legacy Docker image found. Attempting build."], action_name="build_docker_image", status="ERROR", level="debug")
             
         # 3. Attempt to build if neither image exists
         build_success = False
         try:
             logging.info("Building image for project '%s' using helper script.", self.project_name)
-            cmd = ['python3', self.helper_path, 'build_image', '--no-pull', self.project_name]
+            # Without --cache helper.py passes --no-cache to docker build, so every build
+            # would redo all layers even when the daemon already has them
+            cmd = ['python3', self.helper_path, 'build_image', '--cache', '--no-pull', self.project_name]
             log_telemetry_action(title=f"Building image for project '{self.project_name}' using helper script.", msg_list=cmd, action_name="build_docker_image", status="OK", level="verbose")
             # Run the build process
             result = subprocess.run(cmd, capture_output=True, text=True, check=False) # Don't check=True yet
@@ -129,29 +255,17 @@ class SliceRunner:
 
         # 4. Re-check for images after build attempt
         try:
-            self.docker_client.images.get(image_name)
-            logging.info("Found standard Docker image '%s' after build attempt.", image_name)
-            self.effective_image_name = image_name
-            log_telemetry_action(title=f"Found standard Docker image '{image_name}' after build attempt.", msg_list=[], action_name="build_docker_image", status="OK", level="verbose")
-            return True
-        except docker.errors.ImageNotFound:
-            logging.debug("Standard Docker image '%s' still not found after build attempt.", image_name)
+            existing = self._find_existing_image([image_name, legacy_image_name])
         except Exception as e:
-             logging.error("Error checking for standard image '%s' post-build: %s", image_name, e)
-
-
-        try:
-            self.docker_client.images.get(legacy_image_name)
-            logging.info("Found legacy Docker image '%s' after build attempt.", legacy_image_name)
-            self.effective_image_name = legacy_image_name
-            log_telemetry_action(title=f"Found legacy Docker image '{legacy_image_name}' after build attempt.", msg_list=[], action_name="build_docker_image", status="OK", level="verbose")
+            existing = None
+            logging.error("Error checking for images '%s'/'%s' post-build: %s", image_name, legacy_image_name, e)
+            log_telemetry_action(title=f"Error checking for images '{image_name}'/'{legacy_image_name}' post-build: {e}", msg_list=[], action_name="build_docker_image", status="ERROR", level="debug")
+        if existing:
+            kind = "standard" if existing == image_name else "legacy"
+            logging.info("Found %s Docker image '%s' after build attempt.", kind, existing)
+            self.effective_image_name = existing
+            log_telemetry_action(title=f"Found {kind} Docker image '{existing}' after build attempt.", msg_list=[], action_name="build_docker_image", status="OK", level="verbose")
             return True
-        except docker.errors.ImageNotFound:
-            logging.debug("Legacy Docker image '%s' still not found after build attempt.", legacy_image_name)
-            log_telemetry_action(title=f"Legacy Docker image '{legacy_image_name}' still not found after build attempt.", msg_list=[], action_name="build_docker_image", status="ERROR", level="debug")
-        except Exception as e:
-            logging.error("Error checking for legacy image '%s' post-build: %s", legacy_image_name, e)
-            log_telemetry_action(title=f"Error checking for legacy image '{legacy_image_name}' post-build: {e}", msg_list=[], action_name="build_docker_image", status="ERROR", level="debug")
 
         # 5. If neither image found after build attempt
         logging.error("Failed to find or build a usable Docker image ('%s' or '%s').", image_name, legacy_image_name)
@@ -159,6 +273,19 @@ class SliceRunner:
         self.effective_image_name = None
         return False
 
+    def _find_existing_image(self, candidates):
+        """
+        Returns the first of the candidate image names that exists locally, or None.
+        All candidates are checked against one /images/json call, made through the
+        low-level API so no Image objects are built; a name without a tag matches
+        ':latest', as with images.get().
+        """
+        tags = {tag for image in self.docker_client.api.images() for tag in image.get('RepoTags') or ()}
+        for name in candidates:
+            if name in tags or f'{name}:latest' in tags:
+                return name
+        return None
+
     @span_decorator("build_fuzzers")
     def _build_fuzzers(self):
         """
@@ -192,9 +319,7 @@ class SliceRunner:
         slice_target_file = self.workspace_dir / 'slice_targets.txt'
         log_telemetry_action(title=f"Writing slice target functions file to '{slice_target_file}'", msg_list=[], action_name="write_slice_target_file", status="OK", level="info")
         try:
-            with open(slice_target_file, 'w') as f:
-                for path, func in self.slice_target:
-                    f.write(f'{path} {func}\n')
+            slice_target_file.write_bytes("".join(f'{path} {func}\n' for path, func in self.slice_target).encode())
             logging.info("Slice target functions file written to '%s'", slice_target_file)
             log_telemetry_action(title=f"Slice target functions file written to '{slice_target_file}'", msg_list=[], action_name="write_slice_target_file", status="OK", level="verbose")
             return slice_target_file
@@ -225,8 +350,12 @@ class SliceRunner:
             return False
         log_telemetry_action(title=f"Effective Docker image found or built", msg_list=[], action_name="run_slice", status="OK", level="verbose")
 
-        # Prepare all harness directories
-        harness_dirs = self.prepare_harnesses()
+        # Prepare all harness directories, or collect the scan prepare() started
+        if self._harness_future is not None:
+            harness_dirs = self._harness_future.result()
+            self._harness_future = None
+        else:
+            harness_dirs = self.prepare_harnesses()
         if not harness_dirs:
             logging.error("No harnesses found or failed to prepare harness directories.")
             log_telemetry_action(title=f"No harnesses found or failed to prepare harness directories.", msg_list=[], action_name="run_slice", status="ERROR", level="debug")
@@ -235,45 +364,63 @@ class SliceRunner:
         
         success = False
         total_harnesses = len(harness_dirs)
-        current_harness = 0
-        for harness_name, harness_dir in harness_dirs.items():
-            current_harness += 1
-            logging.info(f"Running slice analysis for harness: {harness_name} ({current_harness}/{total_harnesses})")
-            log_telemetry_action(title=f"Running slice analysis for harness: {harness_name} ({current_harness}/{total_harnesses})", msg_list=[], action_name="run_slice", status="OK", level="info")
-            
-            env = [f'PROJECT_NAME={self.project_name}']
-            command = _env_to_docker_args(env)
-            command += [
-                '-v', f'{harness_dir}:/src/{self.project_name}/{BITCODE_FOLDER}',
-                '-v', f'{self.slice_out}/{harness_name}:/out',
-                '-v', f'{self.slice_work}/{harness_name}:/work',
-                '-v', f'{slice_target_file}:/src/slice_target_functions.txt',
-                '-v', f'/app/slice.py:/src/slice.py',
-                self.effective_image_name, # Use the determined image name
-                'python3', '/src/slice.py', harness_name
-            ]
-            # Use precise logging for which image is being used
-            logging.info(f"Running slice analysis for harness '{harness_name}' using image '{self.effective_image_name}'")
-            log_telemetry_action(title=f"Running slice analysis for harness '{harness_name}' using image '{self.effective_image_name}'", msg_list=command, action_name="run_slice", status="OK", level="verbose")
-            
-            # Create output directory for this harness
-            harness_out_dir = self.slice_out / harness_name
-            harness_out_dir.mkdir(parents=True, exist_ok=True)
-            
-            result = docker_run(command)
-            if not result:
-                logging.error(f"Slice analysis failed for harness '{harness_name}'")
-                log_telemetry_action(title=f"Slice analysis failed for harness '{harness_name}'", msg_list=command, action_name="run_slice", status="ERROR", level="debug")
-            else:
-                logging.info(f"Slice analysis succeeded for harness '{harness_name}'. Check '{harness_out_dir}' for details.")
-                log_telemetry_action(title=f"Slice analysis succeeded for harness '{harness_name}'. Check '{harness_out_dir}' for details.", msg_list=[], action_name="run_slice", status="OK", level="verbose")
-                # Track success of at least one harness
-                success = True
-                
-                # Process results for this harness
-                if not self.handle_slice_results(harness_out_dir):
-                    logging.error(f"Failed to handle slice results for harness '{harness_name}'")
-                    log_telemetry_action(title=f"Failed to handle slice results for harness '{harness_name}'", msg_list=[], action_name="run_slice", status="ERROR", level="debug")
+        # Harnesses are independent (separate out, work and bitcode dirs), so they are
+        # sliced concurrently; MAX_PARALLEL_SLICES bounds the load on the host.
+        max_workers = max(1, min(total_harnesses, int(os.getenv('MAX_PARALLEL_SLICES', os.cpu_count() or 1))))
+
+        # Create output directories for all harnesses up front; slice_out itself
+        # exists since __init__ and work dirs are created by prepare_harnesses.
+        for harness_name in harness_dirs:
+            (self.slice_out / harness_name).mkdir(exist_ok=True)
+
+        # Preferably slice all harnesses in a single container, paying container and
+        # interpreter start-up once; harnesses it did not slice get one container each.
+        # Harnesses reported done by the batch container are post-processed by a
+        # consumer thread while the container keeps slicing the rest.
+        done_queue = queue.Queue()
+        consumer = threading.Thread(target=self._handle_results_worker, args=(done_queue,), name='slice-results')
+        consumer.start()
+        # Only touched from this thread: docker_run calls back from the caller's thread
+        sliced = set()
+        skipped = set()
+
+        def on_harness_done(harness_name):
+            sliced.add(harness_name)
+            done_queue.put(harness_name)
+
+        try:
+            batch_ok = self._run_batched_slice(harness_dirs, slice_target_file, max_workers, on_harness_done, skipped.add)
+            if batch_ok:
+                # Anything the container did not report (e.g. lost output) is handled too
+                for harness_name in harness_dirs:
+                    if harness_name not in skipped:
+                        on_harness_done(harness_name)
+        finally:
+            done_queue.put(None)
+            consumer.join()
+        success = bool(sliced)
+
+        # Re-run only what the batch did not slice: the skipped harnesses, or, if the
+        # container failed, every harness it had not reported done yet
+        pending = [(harness_name, harness_dir) for harness_name, harness_dir in harness_dirs.items() if harness_name not in sliced]
+        if pending:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='slice') as executor:
+                futures = [
+                    executor.submit(self._run_harness_slice, harness_name, harness_dir, slice_target_file, index, len(pending))
+                    for index, (harness_name, harness_dir) in enumerate(pending, 1)
+                ]
+                # Results are handled here, one harness at a time, as containers finish
+                for future in as_completed(futures):
+                    harness_name, harness_out_dir, result = future.result()
+                    if not result:
+                        continue
+                    # Track success of at least one harness
+                    success = True
+                    
+                    # Process results for this harness
+                    if not self.handle_slice_results(harness_out_dir):
+                        logging.error(f"Failed to handle slice results for harness '{harness_name}'")
+                        log_telemetry_action(title=f"Failed to handle slice results for harness '{harness_name}'", msg_list=[], action_name="run_slice", status="ERROR", level="debug")
         # Merge results from all harnesses
         if success:
             if not self.merge_slice_results():
@@ -283,6 +430,116 @@ class SliceRunner:
             log_telemetry_action(title=f"Slice results merged successfully from all harnesses", msg_list=[], action_name="run_slice", status="OK", level="verbose")
         return success
 
+    def _handle_results_worker(self, done_queue):
+        """
+        Consumes harness names from done_queue until None and runs handle_slice_results
+        once per harness. This is the only thread other than
+        the caller touching self.current_span, and the caller is blocked in docker_run
+        or join() meanwhile, so span_decorator's bookkeeping stays consistent.
+        """
+        handled = set()
+        while True:
+            harness_name = done_queue.get()
+            if harness_name is None:
+                return
+            if harness_name in handled:
+                continue
+            handled.add(harness_name)
+            # Process results for this harness
+            if not self.handle_slice_results(self.slice_out / harness_name):
+                logging.error(f"Failed to handle slice results for harness '{harness_name}'")
+                log_telemetry_action(title=f"Failed to handle slice results for harness '{harness_name}'", msg_list=[], action_name="run_slice", status="ERROR", level="debug")
+
+    def _run_batched_slice(self, harness_dirs, slice_target_file, max_workers, on_harness_done, on_harness_skipped):
+        """
+        Runs the slice analysis for all harnesses in one container: the whole slice_work
+        and slice_out trees are mounted once and slice.py --batch iterates over a
+        harness list, slicing up to max_workers harnesses at a time. slice_work is
+        mounted over the project's bitcode folder, so each harness's bitcode sits under
+        the same source root as in its own container. on_harness_done is called with
+        each harness name as slice.py reports it finished, on_harness_skipped with those
+        it left for a per-harness container.
+
+        Returns:
+            bool: True if the batch container succeeded, False if the caller should fall
+            back to one container per harness.
+        """
+        bitcode_root = f'/src/{self.project_name}/{BITCODE_FOLDER}'
+        harness_list = [
+            {'name': harness_name, 'bitcode': f'{bitcode_root}/{harness_name}', 'out': f'/slice_out/{harness_name}'}
+            for harness_name in harness_dirs
+        ]
+        harness_list_file = self.workspace_dir / 'harness_list.json'
+        harness_list_file.write_text(json.dumps(harness_list))
+
+        env = [f'PROJECT_NAME={self.project_name}', f'MAX_PARALLEL_SLICES={max_workers}']
+        command = _env_to_docker_args(env)
+        command += [
+            '-v', f'{self.slice_work}:{bitcode_root}',
+            '-v', f'{self.slice_out}:/slice_out',
+            '-v', f'{slice_target_file}:/src/slice_target_functions.txt',
+            '-v', f'{harness_list_file}:/src/harness_list.json',
+            '-v', f'/app/slice.py:/src/slice.py',
+            *self.cache_mount_args,
+            self.effective_image_name, # Use the determined image name
+            'python3', '/src/slice.py', '--batch', '/src/harness_list.json'
+        ]
+        logging.info(f"Running batched slice analysis for {len(harness_list)} harnesses using image '{self.effective_image_name}'")
+        log_telemetry_action(title=f"Running batched slice analysis for {len(harness_list)} harnesses using image '{self.effective_image_name}'", msg_list=command, action_name="run_slice", status="OK", level="verbose")
+
+        def on_output_line(line):
+            if line.startswith(BATCH_DONE_MARKER):
+                harness_name = line[len(BATCH_DONE_MARKER):].strip()
+                if harness_name in harness_dirs:
+                    on_harness_done(harness_name)
+            elif line.startswith(BATCH_SKIPPED_MARKER):
+                harness_name = line[len(BATCH_SKIPPED_MARKER):].strip()
+                if harness_name in harness_dirs:
+                    on_harness_skipped(harness_name)
+
+        if not docker_run(command, on_output_line=on_output_line):
+            logging.warning("Batched slice analysis failed, falling back to one container per harness")
+            log_telemetry_action(title="Batched slice analysis failed, falling back to one container per harness", msg_list=command, action_name="run_slice", status="ERROR", level="debug")
+            return False
+        return True
+
+    def _run_harness_slice(self, harness_name, harness_dir, slice_target_file, index, total_harnesses):
+        """
+        Runs the slice container for a single harness.
+
+        Returns:
+            tuple: (harness_name, harness output directory, whether the container succeeded)
+        """
+        logging.info(f"Running slice analysis for harness: {harness_name} ({index}/{total_harnesses})")
+        log_telemetry_action(title=f"Running slice analysis for harness: {harness_name} ({index}/{total_harnesses})", msg_list=[], action_name="run_slice", status="OK", level="info")
+        
+        env = [f'PROJECT_NAME={self.project_name}']
+        command = _env_to_docker_args(env)
+        command += [
+            '-v', f'{harness_dir}:/src/{self.project_name}/{BITCODE_FOLDER}',
+            '-v', f'{self.slice_out}/{harness_name}:/out',
+            '-v', f'{self.slice_work}/{harness_name}:/work',
+            '-v', f'{slice_target_file}:/src/slice_target_functions.txt',
+            '-v', f'/app/slice.py:/src/slice.py',
+            *self.cache_mount_args,
+            self.effective_image_name, # Use the determined image name
+            'python3', '/src/slice.py', harness_name
+        ]
+        # Use precise logging for which image is being used
+        logging.info(f"Running slice analysis for harness '{harness_name}' using image '{self.effective_image_name}'")
+        log_telemetry_action(title=f"Running slice analysis for harness '{harness_name}' using image '{self.effective_image_name}'", msg_list=command, action_name="run_slice", status="OK", level="verbose")
+        
+        harness_out_dir = self.slice_out / harness_name
+        
+        result = docker_run(command)
+        if not result:
+            logging.error(f"Slice analysis failed for harness '{harness_name}'")
+            log_telemetry_action(title=f"Slice analysis failed for harness '{harness_name}'", msg_list=command, action_name="run_slice", status="ERROR", level="debug")
+        else:
+            logging.info(f"Slice analysis succeeded for harness '{harness_name}'. Check '{harness_out_dir}' for details.")
+            log_telemetry_action(title=f"Slice analysis succeeded for harness '{harness_name}'. Check '{harness_out_dir}' for details.", msg_list=[], action_name="run_slice", status="OK", level="verbose")
+        return harness_name, harness_out_dir, result
+
     @span_decorator("handle_slice_results")
     def handle_slice_results(self, output_dir):
         """
@@ -299,8 +556,20 @@ class SliceRunner:
             bool: True if processing is successful, False otherwise.
         """
         log_telemetry_action(title=f"Processing slice results for harness '{output_dir}'", msg_list=[], action_name="handle_slice_results", status="OK", level="info")
+        # Collect both kinds of result files in a single directory scan.
+        directed_files = []
+        verbose_files = []
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.slicing_func_result'):
+                    directed_files.append(entry.path)
+                elif entry.name.endswith('.slicing_func_result_verbose'):
+                    verbose_files.append((entry.stat().st_size, entry.path))
+        # Smallest first: the intersection can only shrink, so it is most likely to
+        # become empty early, which ends the verbose scan.
+        verbose_files = [path for _, path in sorted(verbose_files)]
+
         # Process non-verbose results for result_directed.
-        directed_files = list(output_dir.glob('*.slicing_func_result'))
         if not directed_files:
             logging.error(f"No '.slicing_func_result' files found in {output_dir}")
             log_telemetry_action(title=f"No '.slicing_func_result' files found in {output_dir}", msg_list=[], action_name="handle_slice_results", status="ERROR", level="debug")
@@ -309,21 +578,16 @@ class SliceRunner:
         union_set = set()
         for result_file in directed_files:
             try:
-                with open(result_file, 'r') as f:
-                    file_entries = {line.strip() for line in f if line.strip()}
-                logging.debug("Read %d entries from '%s'.", len(file_entries), result_file.name)
-                log_telemetry_action(title=f"Read {len(file_entries)} entries from '{result_file.name}'.", msg_list=[], action_name="handle_slice_results", status="OK", level="verbose")
-                union_set |= file_entries
+                union_set.update(_read_entries(result_file))
             except Exception as e:
                 logging.error("Error reading file %s: %s", result_file, e)
                 return False
+        log_telemetry_action(title=lambda: f"Read {len(directed_files)} '.slicing_func_result' files, {len(union_set)} distinct entries.", msg_list=[], action_name="handle_slice_results", status="OK", level="verbose")
 
         # Write the union to 'result_directed'
         result_directed_file = output_dir / 'result_directed'
         try:
-            with open(result_directed_file, 'w') as f:
-                for entry in sorted(union_set):
-                    f.write(f"{entry}\n")
+            _write_entries(result_directed_file, union_set)
             logging.debug("Written %d entries to '%s' (union of .slicing_func_result files).",
                         len(union_set), result_directed_file)
             log_telemetry_action(title=f"Written {len(union_set)} entries to '{result_directed_file}' (union of .slicing_func_result files).", msg_list=[], action_name="handle_slice_results", status="OK", level="verbose")
@@ -333,7 +597,6 @@ class SliceRunner:
             return False
 
         # Process verbose results for result_sarif.
-        verbose_files = list(output_dir.glob('*.slicing_func_result_verbose'))
         if not verbose_files:
             logging.error(f"No '.slicing_func_result_verbose' files found in {output_dir}")
             log_telemetry_action(title=f"No '.slicing_func_result_verbose' files found in {output_dir}", msg_list=[], action_name="handle_slice_results", status="ERROR", level="debug")
@@ -342,24 +605,22 @@ class SliceRunner:
         intersection_set = None
         for result_file in verbose_files:
             try:
-                with open(result_file, 'r') as f:
-                    file_entries = {line.strip() for line in f if line.strip()}
-                logging.debug("Read %d entries from '%s'.", len(file_entries), result_file.name)
-                log_telemetry_action(title=f"Read {len(file_entries)} entries from '{result_file.name}'.", msg_list=[], action_name="handle_slice_results", status="OK", level="verbose")
                 if intersection_set is None:
-                    intersection_set = file_entries
+                    intersection_set = set(_read_entries(result_file))
                 else:
-                    intersection_set &= file_entries
+                    intersection_set.intersection_update(_read_entries(result_file))
             except Exception as e:
                 logging.error("Error reading file %s: %s", result_file, e)
                 return False
+            if not intersection_set:
+                # Nothing can be common to all files any more
+                break
+        log_telemetry_action(title=lambda: f"Read {len(verbose_files)} '.slicing_func_result_verbose' files, {len(intersection_set or ())} common entries.", msg_list=[], action_name="handle_slice_results", status="OK", level="verbose")
 
         # Write the intersection to 'result_sarif'
         result_sarif_file = output_dir / 'result_sarif'
         try:
-            with open(result_sarif_file, 'w') as f:
-                for entry in sorted(intersection_set) if intersection_set is not None else []:
-                    f.write(f"{entry}\n")
+            _write_entries(result_sarif_file, intersection_set or ())
             count = len(intersection_set) if intersection_set is not None else 0
             logging.debug("Written %d entries to '%s' (intersection of .slicing_func_result_verbose files).",
                         count, result_sarif_file)
@@ -384,7 +645,8 @@ class SliceRunner:
         log_telemetry_action(title=f"Merging slice results from all harnesses", msg_list=[], action_name="merge_slice_results", status="OK", level="info")
         
         # Find all harness directories
-        harness_dirs = [d for d in self.slice_out.iterdir() if d.is_dir()]
+        with os.scandir(self.slice_out) as entries:
+            harness_dirs = [entry.path for entry in entries if entry.is_dir()]
         if not harness_dirs:
             logging.error("No harness directories found for merging results")
             log_telemetry_action(title=f"No harness directories found for merging results", msg_list=[], action_name="merge_slice_results", status="ERROR", level="debug")
@@ -393,8 +655,8 @@ class SliceRunner:
         # Get all result_directed files
         result_files = []
         for harness_dir in harness_dirs:
-            result_file = harness_dir / 'result_directed'
-            if result_file.exists():
+            result_file = os.path.join(harness_dir, 'result_directed')
+            if os.path.exists(result_file):
                 result_files.append(result_file)
         
         if not result_files:
@@ -406,22 +668,17 @@ class SliceRunner:
         merged_results = set()
         for result_file in result_files:
             try:
-                with open(result_file, 'r') as f:
-                    file_entries = {line.strip() for line in f if line.strip()}
-                logging.debug("Read %d entries from '%s'", len(file_entries), result_file)
-                log_telemetry_action(title=f"Read {len(file_entries)} entries from '{result_file}'", msg_list=[], action_name="merge_slice_results", status="OK", level="verbose")
-                merged_results |= file_entries
+                merged_results.update(_read_entries(result_file))
             except Exception as e:
                 logging.error("Error reading file %s: %s", result_file, e)
                 log_telemetry_action(title=f"Error reading file {result_file}: {e}", msg_list=[], action_name="merge_slice_results", status="ERROR", level="debug")
                 return False
+        log_telemetry_action(title=lambda: f"Read {len(result_files)} result_directed files, {len(merged_results)} distinct entries", msg_list=[], action_name="merge_slice_results", status="OK", level="verbose")
         
         # Write the merged results to a file
         merged_file = self.slice_out / 'merged_slice_result.txt'
         try:
-            with open(merged_file, 'w') as f:
-                for entry in sorted(merged_results):
-                    f.write(f"{entry}\n")
+            _write_entries(merged_file, merged_results)
             logging.info("Written %d entries to merged result file '%s'", 
                         len(merged_results), merged_file)
             log_telemetry_action(title=f"Written {len(merged_results)} entries to merged result file '{merged_file}'", msg_list=[], action_name="merge_slice_results", status="OK", level="verbose")
@@ -461,7 +718,7 @@ class SliceRunner:
         # Step 1: Find all .bc files
         logging.info("Scanning for BC files")
         log_telemetry_action(title=f"Scanning for BC files", msg_list=[], action_name="prepare_harnesses", status="OK", level="info")
-        all_bc_files = list(self.slice_in.glob('**/*.bc'))
+        all_bc_files = list(_iter_files(self.slice_in, '.bc'))
         if not all_bc_files:
             logging.error(f"No BC files found in {self.slice_in}")
             log_telemetry_action(title=f"No BC files found in {self.slice_in}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
@@ -470,51 +727,24 @@ class SliceRunner:
         # Step 2: Identify harnesses and extract original source files
         logging.info("Identifying harnesses and extracting source file information")
         log_telemetry_action(title=f"Identifying harnesses and extracting source file information", msg_list=[], action_name="prepare_harnesses", status="OK", level="info")
-        for bc_file in all_bc_files:
-            try:
-                # First check if it contains LLVMFuzzerTestOneInput
-                nm_result = subprocess.run(
-                    ['llvm-nm', str(bc_file)],
-                    capture_output=True, 
-                    text=True,
-                    check=True
-                )
-                
-                if 'LLVMFuzzerTestOneInput' not in nm_result.stdout:
-                    continue  # Not a harness, skip to next file
-                
-                # It's a harness! Extract the original source file name using llvm-dis
-                dis_result = subprocess.run(
-                    ['llvm-dis', '-o', '-', str(bc_file)],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                
-                # Parse the output to find source filename
-                source_file = None
-                for line in dis_result.stdout.splitlines():
-                    # Look for source_filename in the LLVM IR
-                    if 'source_filename =' in line:
-                        # Extract quoted filename
-                        parts = line.split('"')
-                        if len(parts) >= 2:
-                            source_file = parts[1]
-                            break
-                
-                if source_file:
-                    # Store just the base filename without path or extension
-                    harness_source_basename = Path(source_file).stem
-                    harnesses[bc_file] = harness_source_basename
-                    logging.debug(f"Found harness in {bc_file.name}, source file: {harness_source_basename}")
-                    log_telemetry_action(title=f"Found harness in {bc_file.name}, source file: {harness_source_basename}", msg_list=[], action_name="prepare_harnesses", status="OK", level="verbose")
-                else:
-                    logging.warning(f"Could not extract source filename from {bc_file}")
-                    log_telemetry_action(title=f"Could not extract source filename from {bc_file}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
-            except subprocess.SubprocessError as e:
-                logging.error(f"Error analyzing BC file {bc_file}: {e}")
-                log_telemetry_action(title=f"Error analyzing BC file {bc_file}: {e}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
+        harness_sources = asyncio.run(self._scan_bc_files(all_bc_files))
+        for bc_file, source_file in harness_sources.items():
+            if isinstance(source_file, subprocess.SubprocessError):
+                logging.error(f"Error analyzing BC file {bc_file}: {source_file}")
+                log_telemetry_action(title=lambda: f"Error analyzing BC file {bc_file}: {source_file}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
                 continue
+            if isinstance(source_file, BaseException):
+                raise source_file
+
+            if source_file:
+                # Store just the base filename without path or extension
+                harness_source_basename = Path(source_file).stem
+                harnesses[Path(bc_file)] = harness_source_basename
+                logging.debug(f"Found harness in {os.path.basename(bc_file)}, source file: {harness_source_basename}")
+                log_telemetry_action(title=lambda: f"Found harness in {os.path.basename(bc_file)}, source file: {harness_source_basename}", msg_list=[], action_name="prepare_harnesses", status="OK", level="verbose")
+            else:
+                logging.warning(f"Could not extract source filename from {bc_file}")
+                log_telemetry_action(title=lambda: f"Could not extract source filename from {bc_file}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
                 
         if not harnesses:
             logging.error("No harness files found")
@@ -524,37 +754,117 @@ class SliceRunner:
         logging.info(f"Found {len(harnesses)} harness files")
         log_telemetry_action(title=f"Found {len(harnesses)} harness files", msg_list=[], action_name="prepare_harnesses", status="OK", level="verbose")
         # Step 3: Create isolated directories for each harness
-        log_telemetry_action(title=f"Creating isolated directories for each harness", msg_list=list(harnesses.items()), action_name="prepare_harnesses", status="OK", level="info")
+        log_telemetry_action(title=f"Creating isolated directories for each harness", msg_list=lambda: list(harnesses.items()), action_name="prepare_harnesses", status="OK", level="info")
         harness_dirs = {}
+        # Harnesses sharing a source basename share a directory: {basename: [bc_file_path]}
+        dir_harnesses = {}
         for harness_path, harness_source_basename in harnesses.items():
             # Create directory using just the basename of the source file
             harness_dir = self.slice_work / harness_source_basename
             harness_dir.mkdir(exist_ok=True)
             harness_dirs[harness_source_basename] = harness_dir
-            
-            # Copy the harness file to the directory
-            dest_path = harness_dir / harness_path.name
-            try:
-                import shutil
-                shutil.copy2(harness_path, dest_path)
-                logging.debug(f"Copied harness {harness_path.name} to {harness_dir}")
-                log_telemetry_action(title=f"Copied harness {harness_path.name} to {harness_dir}", msg_list=[], action_name="prepare_harnesses", status="OK", level="verbose")
-                # Copy all other BC files except for other harnesses
-                for bc_path in all_bc_files:
-                    # Skip other harnesses
-                    if bc_path in harnesses and bc_path != harness_path:
-                        continue
-                        
-                    # Copy the BC file
-                    bc_dest = harness_dir / bc_path.name
-                    shutil.copy2(bc_path, bc_dest)
-                    
-                logging.debug(f"Copied dependent BC files to {harness_dir}")
-            except Exception as e:
-                logging.error(f"Error creating harness directory for {harness_source_basename}: {e}")
-                log_telemetry_action(title=f"Error creating harness directory for {harness_source_basename}: {e}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
-                continue
+            dir_harnesses.setdefault(harness_source_basename, []).append(harness_path)
+
+        # Populate the directories concurrently, one task per directory so no two
+        # threads write the same files; the copies are I/O-bound
+        harness_paths = frozenset(str(harness_path) for harness_path in harnesses)
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(dir_harnesses))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='harness-dir') as executor:
+            futures = {
+                executor.submit(self._populate_harness_dir, dir_harness_paths, harness_dirs[harness_source_basename], all_bc_files, harness_paths): harness_source_basename
+                for harness_source_basename, dir_harness_paths in dir_harnesses.items()
+            }
+            for future in as_completed(futures):
+                harness_source_basename = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error creating harness directory for {harness_source_basename}: {e}")
+                    log_telemetry_action(title=f"Error creating harness directory for {harness_source_basename}: {e}", msg_list=[], action_name="prepare_harnesses", status="ERROR", level="debug")
                 
         logging.info(f"Created {len(harnesses)} harness directories")
         log_telemetry_action(title=f"Created {len(harnesses)} harness directories", msg_list=[], action_name="prepare_harnesses", status="OK", level="verbose")
-        return harness_dirs
\ No newline at end of file
+        return harness_dirs
+
+    def _populate_harness_dir(self, dir_harness_paths, harness_dir, all_bc_files, harness_paths):
+        """
+        Copies the harnesses in dir_harness_paths and every BC file that is not a harness
+        into harness_dir. The dependent BC files are only read, so they are hard linked
+        unless SLICE_USE_HARDLINKS is 0 or the filesystem does not allow it.
+        """
+        # Copy the harness files to the directory
+        for harness_path in dir_harness_paths:
+            shutil.copy2(harness_path, harness_dir / harness_path.name)
+            logging.debug(f"Copied harness {harness_path.name} to {harness_dir}")
+            log_telemetry_action(title=lambda: f"Copied harness {harness_path.name} to {harness_dir}", msg_list=[], action_name="prepare_harnesses", status="OK", level="verbose")
+        # Link (or copy) all other BC files except for the harnesses
+        can_link = USE_HARDLINKS
+        for bc_path in all_bc_files:
+            if bc_path in harness_paths:
+                continue
+            can_link = link_or_copy(bc_path, os.path.join(harness_dir, os.path.basename(bc_path)), can_link)
+        logging.debug(f"Linked dependent BC files into {harness_dir}" if can_link else f"Copied dependent BC files to {harness_dir}")
+
+    async def _scan_bc_files(self, bc_files):
+        """
+        Finds the harnesses among bc_files, i.e. files defining LLVMFuzzerTestOneInput,
+        with one llvm-nm call per NM_BATCH_SIZE files, then extracts each harness's
+        original source file name from its bitcode metadata. At most SCAN_CONCURRENCY
+        tool processes run at once.
+
+        Returns:
+            dict: Harness BC file -> source file name, None if it could not be found,
+            or the exception raised while reading it. In bc_files order.
+        """
+        semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+        batches = [bc_files[i:i + NM_BATCH_SIZE] for i in range(0, len(bc_files), NM_BATCH_SIZE)]
+        batch_harnesses = await asyncio.gather(*(self._find_harnesses(batch, semaphore) for batch in batches))
+        harness_files = [bc_file for harnesses in batch_harnesses for bc_file in harnesses]
+        source_files = await asyncio.gather(*(self._read_source_filename(bc_file, semaphore) for bc_file in harness_files), return_exceptions=True)
+        return dict(zip(harness_files, source_files))
+
+    async def _find_harnesses(self, bc_files, semaphore):
+        """
+        Runs a single llvm-nm over bc_files and returns those that define
+        LLVMFuzzerTestOneInput. A file llvm-nm cannot read has no symbols in the
+        output and is therefore not reported as a harness.
+        """
+        async with semaphore:
+            # -A prefixes every line with "<file>: ", -j leaves just the symbol name
+            nm_stdout = await _run_tool('llvm-nm', '--defined-only', '-A', '-j', *bc_files, check=False)
+        # Most batches contain no harness at all; skip the line scan for those
+        if HARNESS_SYMBOL not in nm_stdout:
+            return []
+        suffix = b': ' + HARNESS_SYMBOL
+        found = {
+            os.fsdecode(line[:-len(suffix)])
+            for line in nm_stdout.splitlines()
+            if line.endswith(suffix)
+        }
+        return [bc_file for bc_file in bc_files if bc_file in found]
+
+    async def _read_source_filename(self, bc_file, semaphore):
+        """
+        Extracts the original source file name of a BC file, or returns None if there
+        is none. The name is read straight from the bitcode; the source_filename entry
+        of its llvm-dis disassembly is only used if the bitcode cannot be parsed.
+        """
+        try:
+            return read_source_filename(bc_file)
+        except (OSError, ValueError) as e:
+            logging.debug(f"Could not read source filename from {bc_file} directly, falling back to llvm-dis: {e}")
+
+        async with semaphore:
+            dis_stdout = await _run_tool('llvm-dis', '-o', '-', bc_file)
+
+        # Look for source_filename in the LLVM IR; only that line is decoded
+        start = dis_stdout.find(b'source_filename =')
+        if start == -1:
+            return None
+        end = dis_stdout.find(b'\n', start)
+        line = dis_stdout[start:end if end != -1 else len(dis_stdout)]
+        # Extract quoted filename
+        parts = line.split(b'"')
+        if len(parts) >= 2:
+            return os.fsdecode(parts[1])
+        return None
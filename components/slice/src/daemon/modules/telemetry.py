@@ -2,6 +2,9 @@ import time
 import logging
 import os
 import json
+import queue
+import atexit
+import threading
 from typing import Optional, Dict, Any
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
@@ -230,15 +233,75 @@ def log_action_from_metrics(
 
     log_action(slice_title, slice_msg, crs_action_category, crs_action_name, status, log_level)
 
-def log_telemetry_action(title: str, msg_list: list, action_name: str, status: str, level: str = "verbose"):
-    return True
+# Telemetry action levels from most to least detailed. Actions below
+# SLICE_TELEMETRY_LEVEL are dropped before anything is built; the default
+# "off" disables action telemetry entirely.
+TELEMETRY_LEVELS = {"verbose": 0, "debug": 1, "info": 2, "off": 3}
+_TELEMETRY_MIN_LEVEL = TELEMETRY_LEVELS.get(os.getenv("SLICE_TELEMETRY_LEVEL", "off"), TELEMETRY_LEVELS["off"])
+
+def telemetry_enabled(level: str) -> bool:
+    """
+    Whether actions logged at `level` are exported; lets call sites skip building
+    expensive titles/messages altogether.
+    """
+    return TELEMETRY_LEVELS.get(level, TELEMETRY_LEVELS["verbose"]) >= _TELEMETRY_MIN_LEVEL
+
+# Actions are exported by a background thread so span creation and export
+# never run on the caller's path; flush_telemetry() waits for the backlog.
+_telemetry_queue = queue.SimpleQueue()
+_telemetry_thread = None
+_telemetry_thread_lock = threading.Lock()
+
+def _telemetry_worker():
+    while True:
+        item = _telemetry_queue.get()
+        if isinstance(item, threading.Event):
+            # Flush marker: everything queued before it has been exported
+            item.set()
+            continue
+        telemetry_metric, action_name, status = item
+        try:
+            log_action_from_metrics(metrics=telemetry_metric, crs_action_name=action_name, status_str=status)
+        except Exception as e:
+            logging.error("Error logging action: %s", e)
+
+def _ensure_telemetry_thread():
+    global _telemetry_thread
+    if _telemetry_thread is None:
+        with _telemetry_thread_lock:
+            if _telemetry_thread is None:
+                _telemetry_thread = threading.Thread(target=_telemetry_worker, name="telemetry", daemon=True)
+                _telemetry_thread.start()
+
+def flush_telemetry(timeout: float = 10.0) -> bool:
+    """
+    Wait until all actions queued so far have been exported.
+    Returns False if the backlog was not drained within `timeout` seconds.
+    """
+    if _telemetry_thread is None:
+        return True
+    done = threading.Event()
+    _telemetry_queue.put(done)
+    return done.wait(timeout)
+
+atexit.register(flush_telemetry)
+
+def log_telemetry_action(title, msg_list, action_name: str, status: str, level: str = "verbose"):
+    """
+    Log a CRS action. `title` and `msg_list` may also be zero-argument callables,
+    which are only invoked when the level is enabled. They are evaluated right away
+    and the action is queued for export by the background telemetry thread.
+    """
+    if not telemetry_enabled(level):
+        return True
     try:
         telemetry_metric = get_telemetry_metric_mock()
-        telemetry_metric["title"].append(title)
-        telemetry_metric["msg"].extend(msg_list)
+        telemetry_metric["title"].append(title() if callable(title) else title)
+        telemetry_metric["msg"].extend(msg_list() if callable(msg_list) else msg_list)
         telemetry_metric["log.level"] = level
-        log_action_from_metrics(metrics=telemetry_metric, crs_action_name=action_name, status_str=status)
     except Exception as e:
         logging.error("Error logging action: %s", e)
         return False
+    _ensure_telemetry_thread()
+    _telemetry_queue.put((telemetry_metric, action_name, status))
     return True
@@ -1,3 +1,5 @@
+import os
+import errno
 import shutil
 import tarfile
 import logging
@@ -8,6 +10,46 @@ from utils.misc import safe_extract_tar
 
 from daemon.modules.telemetry import log_telemetry_action
 
+# Compressed formats tarfile can open: gzip, bzip2, xz
+_COMPRESSED_MAGICS = (b'\x1f\x8b', b'BZh', b'\xfd7zXZ\x00')
+
+def _looks_like_tar(path):
+    """
+    Tells tarballs apart by their first 512 bytes: the ustar magic of a plain tar
+    header, or the magic of a compression format tarfile supports. Only when neither
+    matches (e.g. a pre-POSIX tar) is tarfile.is_tarfile consulted.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(512)
+    if head[257:262] == b'ustar' or head.startswith(_COMPRESSED_MAGICS):
+        return True
+    return tarfile.is_tarfile(path)
+
+# Directories that never hold the diff or infra/helper.py but can be huge
+_PRUNED_DIRS = frozenset({'.git', 'node_modules', 'build', '.venv', '__pycache__', 'target'})
+
+# Largest request handed to a single copy_file_range call
+_COPY_CHUNK = 1 << 30
+
+def _fast_copy(src, dst):
+    """
+    Copies the contents of src to dst with os.copy_file_range, so the data stays in
+    the kernel (and may be reflinked). Falls back to shutil.copyfile where the call
+    is unavailable or refused. File metadata is not preserved; the copies are
+    transient workspace inputs.
+    """
+    if hasattr(os, 'copy_file_range'):
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), _COPY_CHUNK):
+                    pass
+                return
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL, errno.EPERM):
+                    raise
+                logging.debug(f"copy_file_range failed for {src} ({e}), copying through userspace")
+    shutil.copyfile(src, dst)
+
 class WorkspaceManager:
     def __init__(self, base_dir, msg: SliceMsg):
         """
@@ -17,15 +59,19 @@ class WorkspaceManager:
             base_dir (str): The base directory for workspaces.
             msg (DirectedMsg): The incoming message containing repository info.
         """
-        self.base_dir = Path(base_dir).resolve()
+        # base_dir comes from the agent config, so a string-level absolute path is
+        # enough; symlinks are only resolved when the plain check fails (e.g. a /tmp
+        # that is itself a symlink).
+        self.base_dir = Path(os.path.abspath(base_dir))
         self.msg = msg
-        tmp_dir = Path('/tmp').resolve()
 
         # Security check: Ensure base_dir is within /tmp to prevent accidental data loss.
-        try:
-            self.base_dir.relative_to(tmp_dir)
-        except ValueError:
-            raise ValueError(f'Attempt to use non-tmp dir {self.base_dir} as workspace')
+        base = str(self.base_dir)
+        if base != '/tmp' and not base.startswith('/tmp' + os.sep):
+            try:
+                self.base_dir.resolve().relative_to(Path('/tmp').resolve())
+            except ValueError:
+                raise ValueError(f'Attempt to use non-tmp dir {self.base_dir} as workspace')
 
     def __enter__(self):
         """Create and return a workspace for processing a work unit."""
@@ -48,13 +94,16 @@ class WorkspaceManager:
         # Optionally cleanup here or leave the workspace for further inspection.
         # self.cleanup_workspace()
 
-    def create_workspace(self):
-        """Creates the workspace directory, cleaning up any preexisting directory."""
+    def create_workspace(self, force=False):
+        """
+        Creates the workspace directory. The worker_id is a fresh uuid, so the directory
+        does not exist yet; with force=True a preexisting directory is cleaned up first.
+        """
         if not hasattr(self, 'worker_id'):
             raise ValueError('Workspace must be created within a "with" statement.')
 
         logging.info(f'Assigned worker_id: {self.worker_id} with work_dir: {self.workspace_dir}')
-        if self.workspace_dir.exists():
+        if force and self.workspace_dir.exists():
             logging.info(f"Cleaning up preexisting workspace: {self.workspace_dir}")
             shutil.rmtree(self.workspace_dir)
         self.workspace_dir.mkdir(parents=True, exist_ok=True)
@@ -96,13 +145,13 @@ class WorkspaceManager:
             diff_tar_path = self.workspace_dir / diff_repo_path.name
 
             try:
-                shutil.copy2(diff_repo_path, diff_tar_path)
+                _fast_copy(diff_repo_path, diff_tar_path)
                 logging.debug(f"Copied diff repo {diff_repo_path} to workspace at {diff_tar_path}")
             except Exception as e:
                 logging.error(f"Failed to copy diff repo {diff_repo_path}: {e}")
                 raise
 
-            if tarfile.is_tarfile(diff_tar_path):
+            if _looks_like_tar(diff_tar_path):
                 # Extract the tar file into its own subdirectory using the full name
                 diff_extracted = self.workspace_dir / f"{diff_repo_path.name}_extracted"
                 diff_extracted.mkdir(exist_ok=True)
@@ -143,13 +192,13 @@ class WorkspaceManager:
             ft_tar_path = self.workspace_dir / ft_repo_path.name
 
             try:
-                shutil.copy2(ft_repo_path, ft_tar_path)
+                _fast_copy(ft_repo_path, ft_tar_path)
                 logging.debug(f"Copied fuzzing_tooling repo {ft_repo_path} to workspace at {ft_tar_path}")
             except Exception as e:
                 logging.error(f"Failed to copy fuzzing_tooling repo {ft_repo_path}: {e}")
                 raise
 
-            if tarfile.is_tarfile(ft_tar_path):
+            if _looks_like_tar(ft_tar_path):
                 # Extract the tar file into its own subdirectory using the full name
                 ft_extracted = self.workspace_dir / f"{ft_repo_path.name}_extracted"
                 ft_extracted.mkdir(exist_ok=True)
@@ -187,13 +236,13 @@ class WorkspaceManager:
                 dest_path = self.workspace_dir / repo_path.name
 
                 try:
-                    shutil.copy2(repo_path, dest_path)
+                    _fast_copy(repo_path, dest_path)
                     logging.debug(f"Copied repo {repo_path} to workspace at {dest_path}")
                 except Exception as e:
                     logging.error(f"Failed to copy repo {repo_path}: {e}")
                     raise
 
-                if tarfile.is_tarfile(dest_path):
+                if _looks_like_tar(dest_path):
                     try:
                         safe_extract_tar(dest_path, self.workspace_dir)
                     except Exception as e:
@@ -210,14 +259,17 @@ class WorkspaceManager:
         If multiple exist, a warning is logged and the first one is returned.
         If none exist, the extracted_dir itself is returned.
         """
-        subdirs = [p for p in extracted_dir.iterdir() if p.is_dir()]
-        if len(subdirs) == 1:
-            return subdirs[0]
-        elif subdirs:
-            logging.warning(f"Multiple top-level directories found in {extracted_dir}. Using the first one: {subdirs[0]}")
-            return subdirs[0]
-        else:
-            return extracted_dir
+        first = None
+        with os.scandir(extracted_dir) as entries:
+            for entry in entries:
+                # DirEntry.is_dir() only stats symlinks; other types come from the dirent
+                if not entry.is_dir():
+                    continue
+                if first is not None:
+                    logging.warning(f"Multiple top-level directories found in {extracted_dir}. Using the first one: {first}")
+                    break
+                first = Path(entry.path)
+        return first if first is not None else extracted_dir
 
     def find_helper_in_infra(self, base_dir: Path):
         """
@@ -229,9 +281,8 @@ class WorkspaceManager:
         Returns:
             The resolved path to helper.py if found, otherwise None.
         """
-        for path in base_dir.rglob("helper.py"):
-            if path.parent.name == "infra":
-                return path.resolve()
+        for path in self._walk_files(base_dir, lambda name, parent: name == "helper.py" and parent == "infra"):
+            return Path(path).resolve()
         return None
 
     def find_diff_file(self, base_dir: Path):
@@ -245,12 +296,33 @@ class WorkspaceManager:
             The resolved path to the first .diff file found. If multiple are found, a warning is logged.
             Returns None if no .diff file is found.
         """
-        diff_files = list(base_dir.rglob("*.diff"))
+        diff_files = list(self._walk_files(base_dir, lambda name, parent: name.endswith(".diff")))
         if not diff_files:
             return None
         if len(diff_files) > 1:
             logging.warning(f"Multiple .diff files found under {base_dir}. Using the first one: {diff_files[0]}")
-        return diff_files[0].resolve()
+        return Path(diff_files[0]).resolve()
+
+    @staticmethod
+    def _walk_files(base_dir, match):
+        """
+        Yields the paths (as str) of files under base_dir for which
+        match(file name, parent directory name) holds. Walks with os.scandir, so
+        no Path object is built per entry and the file type comes from the
+        directory entry; stopping the iteration ends the walk. VCS, dependency
+        and build output directories (_PRUNED_DIRS) are not descended into.
+        """
+        stack = [str(base_dir)]
+        while stack:
+            current = stack.pop()
+            parent = os.path.basename(current)
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _PRUNED_DIRS:
+                            stack.append(entry.path)
+                    elif match(entry.name, parent):
+                        yield entry.path
     
     def get_focused_repo(self):
         """Retrieve a specific focused repository"""
@@ -1,15 +1,41 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
 from db.models.base import Base
 
 class DBConnection:
     def __init__(self, db_url):
-        self.engine = create_engine(db_url)
-        self.Session = sessionmaker(bind=self.engine)
+        # Connections are recycled before server-side idle timeouts can close them,
+        # so the per-checkout pre-ping round-trip is not needed
+        self.engine = create_engine(db_url, pool_size=16, max_overflow=16, pool_recycle=1800, pool_pre_ping=False)
+        if os.getenv('SLICE_DB_ASYNC_COMMIT') == '1' and self.engine.dialect.name == 'postgresql':
+            # Opt-in: don't wait for the WAL flush on commit; a crash may lose the
+            # last few committed rows
+            event.listen(self.engine, 'connect', self._disable_synchronous_commit)
+        # One session per thread, reused across writes; objects stay usable after commit
+        self.Session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
         Base.metadata.create_all(bind=self.engine)
 
+    @staticmethod
+    def _disable_synchronous_commit(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SET synchronous_commit = off")
+        cursor.close()
+
     def write_to_db(self, obj):
+        self.write_many([obj])
+
+    def write_many(self, objs, chunk=500):
+        """
+        Writes objs in transactions of up to `chunk` rows each, one commit per chunk.
+        """
+        objs = list(objs)
         session = self.Session()
-        session.add(obj)
-        session.commit()
-        session.close()
+        try:
+            for i in range(0, len(objs), chunk):
+                session.add_all(objs[i:i + chunk])
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
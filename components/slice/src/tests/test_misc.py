@@ -0,0 +1,67 @@
+import io
+import tarfile
+
+import pytest
+
+from utils.misc import safe_extract_tar
+
+
+def make_tar(path, members):
+    """Write a tar at path from (name, symlink target or file bytes) pairs."""
+    with tarfile.open(path, "w") as tar:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+            if isinstance(content, str):
+                info.type = tarfile.SYMTYPE
+                info.linkname = content
+                tar.addfile(info)
+            else:
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+
+
+def test_extracts_regular_members(tmp_path):
+    make_tar(tmp_path / "a.tar", [("repo/file.txt", b"data")])
+    out = tmp_path / "out"
+    out.mkdir()
+
+    safe_extract_tar(tmp_path / "a.tar", out)
+
+    assert (out / "repo" / "file.txt").read_bytes() == b"data"
+
+
+def test_rejects_parent_traversal(tmp_path):
+    make_tar(tmp_path / "a.tar", [("../evil.txt", b"x")])
+    out = tmp_path / "out"
+    out.mkdir()
+
+    with pytest.raises(RuntimeError, match="Unsafe extraction"):
+        safe_extract_tar(tmp_path / "a.tar", out)
+    assert not (tmp_path / "evil.txt").exists()
+
+
+def test_rejects_symlink_within_archive(tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    make_tar(tmp_path / "a.tar", [("link", str(outside)), ("link/evil.txt", b"x")])
+    out = tmp_path / "out"
+    out.mkdir()
+
+    with pytest.raises(RuntimeError, match="Unsafe extraction"):
+        safe_extract_tar(tmp_path / "a.tar", out)
+    assert not (outside / "evil.txt").exists()
+
+
+def test_rejects_symlink_from_earlier_archive(tmp_path):
+    # Repo tarballs are extracted one after another into the same workspace
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    make_tar(tmp_path / "a1.tar", [("link", str(outside))])
+    make_tar(tmp_path / "a2.tar", [("link/evil.txt", b"x")])
+    out = tmp_path / "out"
+    out.mkdir()
+
+    safe_extract_tar(tmp_path / "a1.tar", out)
+    with pytest.raises(RuntimeError, match="Unsafe extraction"):
+        safe_extract_tar(tmp_path / "a2.tar", out)
+    assert not (outside / "evil.txt").exists()
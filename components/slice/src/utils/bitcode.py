@@ -0,0 +1,205 @@
+import mmap
+
+# Minimal reader for the LLVM bitstream container, just enough to pull single
+# records out of the module block without disassembling the whole module.
+# See https://llvm.org/docs/BitCodeFormat.html
+
+BITCODE_MAGIC = b'BC\xc0\xde'
+WRAPPER_MAGIC = b'\xde\xc0\x17\x0b'
+
+# Builtin abbreviation ids
+END_BLOCK = 0
+ENTER_SUBBLOCK = 1
+DEFINE_ABBREV = 2
+UNABBREV_RECORD = 3
+
+# Abbreviation operand encodings
+ENC_FIXED = 1
+ENC_VBR = 2
+ENC_ARRAY = 3
+ENC_CHAR6 = 4
+ENC_BLOB = 5
+
+BLOCKINFO_BLOCK_ID = 0
+BLOCKINFO_CODE_SETBID = 1
+MODULE_BLOCK_ID = 8
+MODULE_CODE_SOURCE_FILENAME = 16
+
+_CHAR6 = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._'
+
+
+class _BitReader:
+    def __init__(self, data, start, end):
+        self.data = data
+        self.pos = start * 8
+        self.end = end * 8
+
+    def read(self, width):
+        if width == 0:
+            return 0
+        if self.pos + width > self.end:
+            raise ValueError("Unexpected end of bitcode")
+        byte = self.pos >> 3
+        chunk = int.from_bytes(self.data[byte:byte + ((self.pos & 7) + width + 7) // 8], 'little')
+        self.pos += width
+        return (chunk >> ((self.pos - width) & 7)) & ((1 << width) - 1)
+
+    def read_vbr(self, width):
+        hibit = 1 << (width - 1)
+        value = 0
+        shift = 0
+        while True:
+            piece = self.read(width)
+            value |= (piece & (hibit - 1)) << shift
+            if not piece & hibit:
+                return value
+            shift += width - 1
+
+    def align32(self):
+        self.pos = (self.pos + 31) & ~31
+
+    def skip_bytes(self, count):
+        self.pos += count * 8
+
+
+def _read_abbrev(reader):
+    """Reads a DEFINE_ABBREV body into a list of (encoding or None, value) ops."""
+    ops = []
+    for _ in range(reader.read_vbr(5)):
+        if reader.read(1):
+            ops.append((None, reader.read_vbr(8)))  # literal
+        else:
+            encoding = reader.read(3)
+            value = reader.read_vbr(5) if encoding in (ENC_FIXED, ENC_VBR) else 0
+            ops.append((encoding, value))
+    return ops
+
+
+def _read_scalar(reader, encoding, value):
+    if encoding is None:
+        return value
+    if encoding == ENC_FIXED:
+        return reader.read(value)
+    if encoding == ENC_VBR:
+        return reader.read_vbr(value)
+    if encoding == ENC_CHAR6:
+        return ord(_CHAR6[reader.read(6)])
+    raise ValueError(f"Unexpected abbreviation encoding {encoding}")
+
+
+def _read_record(reader, abbrev_id, abbrevs):
+    """Reads one record and returns (code, operands)."""
+    if abbrev_id == UNABBREV_RECORD:
+        code = reader.read_vbr(6)
+        return code, [reader.read_vbr(6) for _ in range(reader.read_vbr(6))]
+
+    try:
+        ops = abbrevs[abbrev_id - 4]
+    except IndexError:
+        raise ValueError(f"Undefined abbreviation {abbrev_id}")
+    values = []
+    i = 0
+    while i < len(ops):
+        encoding, value = ops[i]
+        if encoding == ENC_ARRAY:
+            element_encoding, element_value = ops[i + 1]
+            values.extend(_read_scalar(reader, element_encoding, element_value) for _ in range(reader.read_vbr(6)))
+            i += 2
+        elif encoding == ENC_BLOB:
+            length = reader.read_vbr(6)
+            reader.align32()
+            byte = reader.pos >> 3
+            values.extend(reader.data[byte:byte + length])
+            reader.skip_bytes(length)
+            reader.align32()
+            i += 1
+        else:
+            values.append(_read_scalar(reader, encoding, value))
+            i += 1
+    return values[0], values[1:]
+
+
+def _enter_block(reader):
+    """Reads the ENTER_SUBBLOCK header; returns (block id, abbrev width, length in bytes)."""
+    block_id = reader.read_vbr(8)
+    abbrev_width = reader.read_vbr(4)
+    reader.align32()
+    return block_id, abbrev_width, reader.read(32) * 4
+
+
+def _read_blockinfo(reader, abbrev_width, blockinfo):
+    """Collects the abbreviations a BLOCKINFO block defines for other blocks."""
+    current = None
+    while True:
+        abbrev_id = reader.read(abbrev_width)
+        if abbrev_id == END_BLOCK:
+            reader.align32()
+            return
+        if abbrev_id == ENTER_SUBBLOCK:
+            _, _, length = _enter_block(reader)
+            reader.skip_bytes(length)
+        elif abbrev_id == DEFINE_ABBREV:
+            if current is None:
+                raise ValueError("DEFINE_ABBREV before SETBID in BLOCKINFO")
+            blockinfo.setdefault(current, []).append(_read_abbrev(reader))
+        else:
+            code, operands = _read_record(reader, abbrev_id, [])
+            if code == BLOCKINFO_CODE_SETBID and operands:
+                current = operands[0]
+
+
+def _find_module_record(reader, wanted_code):
+    """
+    Walks the top level down into the first MODULE_BLOCK and returns the operands of
+    its first record with wanted_code, or None. Nested blocks other than BLOCKINFO
+    are skipped by their length without being decoded.
+    """
+    blockinfo = {}
+    abbrev_width = 2
+    abbrevs = None  # None while at the top level
+    while reader.pos < reader.end:
+        abbrev_id = reader.read(abbrev_width)
+        if abbrev_id == END_BLOCK:
+            if abbrevs is not None:
+                return None  # end of the module block
+            reader.align32()
+        elif abbrev_id == ENTER_SUBBLOCK:
+            block_id, width, length = _enter_block(reader)
+            if block_id == BLOCKINFO_BLOCK_ID:
+                _read_blockinfo(reader, width, blockinfo)
+            elif block_id == MODULE_BLOCK_ID and abbrevs is None:
+                abbrev_width = width
+                abbrevs = list(blockinfo.get(MODULE_BLOCK_ID, ()))
+            else:
+                reader.skip_bytes(length)
+        elif abbrev_id == DEFINE_ABBREV:
+            if abbrevs is None:
+                raise ValueError("DEFINE_ABBREV outside of a block")
+            abbrevs.append(_read_abbrev(reader))
+        else:
+            if abbrevs is None:
+                raise ValueError("Record outside of a block")
+            code, operands = _read_record(reader, abbrev_id, abbrevs)
+            if code == wanted_code:
+                return operands
+    return None
+
+
+def read_source_filename(bc_path):
+    """
+    Returns the source_filename of an LLVM bitcode file, read straight from the
+    MODULE_CODE_SOURCE_FILENAME record, or None if the module has none.
+    Raises ValueError if the file is not well-formed bitcode.
+    """
+    with open(bc_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start, end = 0, len(data)
+        if data[:4] == WRAPPER_MAGIC:
+            # Bitcode wrapper header: magic, version, offset, size, cputype
+            start = int.from_bytes(data[8:12], 'little')
+            end = start + int.from_bytes(data[12:16], 'little')
+        if data[start:start + 4] != BITCODE_MAGIC or end > len(data):
+            raise ValueError(f"{bc_path} is not an LLVM bitcode file")
+        operands = _find_module_record(_BitReader(data, start + 4, end), MODULE_CODE_SOURCE_FILENAME)
+    if operands is None:
+        return None
+    return bytes(operands).decode(errors='replace')
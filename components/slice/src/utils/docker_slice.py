@@ -3,6 +3,7 @@ import sys
 import subprocess
 import logging
 import os
+import functools
 
 def _get_command_string(command):
   """Returns a shell escaped command string."""
@@ -12,12 +13,22 @@ def _env_to_docker_args(env_list):
   """Turns envirnoment variable list into docker arguments."""
   return sum([['-e', v] for v in env_list], [])
 
-def docker_run(run_args, print_output=True, architecture='x86_64'):
-  """Calls `docker run`."""
+# Shared sink for runs with print_output=False
+_DEVNULL = open(os.devnull, 'wb')
+
+# Whether to pass -i; stdin does not change over the life of the process.
+_IS_TTY = sys.stdin is not None and sys.stdin.isatty()
+
+@functools.lru_cache(maxsize=None)
+def _base_command(architecture):
+  """Returns the fixed `docker run` prefix for |architecture|."""
   platform = 'linux/arm64' if architecture == 'aarch64' else 'linux/amd64'
-  command = [
-      'docker', 'run', '--privileged', '--shm-size=2g', '--platform', platform
-  ]
+  return ('docker', 'run', '--privileged', '--shm-size=2g', '--platform', platform)
+
+def docker_run(run_args, print_output=True, architecture='x86_64', on_output_line=None):
+  """Calls `docker run`. If given, |on_output_line| is called with every line the
+  container prints, as it is printed."""
+  command = list(_base_command(architecture))
   if os.getenv('OSS_FUZZ_SAVE_CONTAINERS_NAME'):
     command.append('--name')
     command.append(os.getenv('OSS_FUZZ_SAVE_CONTAINERS_NAME'))
@@ -25,19 +36,24 @@ def docker_run(run_args, print_output=True, architecture='x86_64'):
     command.append('--rm')
 
   # Support environments with a TTY.
-  if sys.stdin.isatty():
+  if _IS_TTY:
     command.append('-i')
 
   command.extend(run_args)
 
   logging.info('Running: %s.', _get_command_string(command))
-  stdout = None
-  if not print_output:
-    stdout = open(os.devnull, 'w')
-
-  try:
-    subprocess.check_call(command, stdout=stdout, stderr=subprocess.STDOUT)
-  except subprocess.CalledProcessError:
-    return False
 
-  return True
\ No newline at end of file
+  # The docker client runs in its own session, so a SIGINT aimed at our process
+  # group does not tear down half-finished containers.
+  if on_output_line is not None:
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, errors='replace', start_new_session=True) as proc:
+      for line in proc.stdout:
+        if print_output:
+          sys.stdout.write(line)
+        on_output_line(line)
+    return proc.returncode == 0
+
+  stdout = None if print_output else _DEVNULL
+  proc = subprocess.Popen(command, stdout=stdout, stderr=subprocess.STDOUT, start_new_session=True)
+  return proc.wait() == 0
\ No newline at end of file
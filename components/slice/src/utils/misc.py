@@ -1,20 +1,30 @@
+import os
+import errno
+import shutil
 import logging
 import subprocess
 import tarfile
 from pathlib import Path
 
 def safe_extract_tar(tar_path, extract_path):
-    """Extract tars securely"""
+    """Extract tars securely, in a single sequential pass over the archive"""
     extract_path = Path(extract_path).resolve()
 
-    with tarfile.open(tar_path, "r:*") as tar:
-        for member in tar.getmembers():
-            member_path = (extract_path / member.name).resolve()
+    # Stream mode ("r|*") never seeks back: each member is checked as its header
+    # is read and extracted right away, instead of indexing the whole archive first
+    root = str(extract_path)
+    base = os.path.join(root, "")
+    with tarfile.open(tar_path, "r|*") as tar:
+        def safe_members():
+            # Resolve every member: a symlink left in extract_path by an earlier
+            # archive (or this one) could otherwise redirect a later member path
+            for member in tar:
+                member_path = str((extract_path / member.name).resolve())
+                if member_path != root and not member_path.startswith(base):
+                    raise RuntimeError(f"Unsafe extraction detected: {member_path}")
+                yield member
 
-            if not str(member_path).startswith(str(extract_path)):
-                raise RuntimeError(f"Unsafe extraction detected: {member_path}")
-
-            tar.extract(member, extract_path)
+        tar.extractall(extract_path, members=safe_members())
         logging.debug(f"Safely extracted {tar_path}")
 
 def run_command(command):
@@ -25,3 +35,39 @@ def run_command(command):
     except subprocess.CalledProcessError as e:
         logging.error(f"Command failed: {e.stderr}")
         raise
+
+def link_or_copy(src_path, dst_path, try_link=True):
+    """
+    Hard link src_path to dst_path, replacing an existing dst_path, or copy it when
+    try_link is False or linking is not possible (e.g. across devices).
+    Returns whether linking is worth trying for further files.
+    """
+    if try_link:
+        try:
+            try:
+                os.link(src_path, dst_path)
+            except FileExistsError:
+                os.unlink(dst_path)
+                os.link(src_path, dst_path)
+            return True
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            logging.debug(f"Cannot hard link {src_path} to {dst_path} ({e}), copying instead")
+    shutil.copy2(src_path, dst_path)
+    return False
+
+def link_tree(src_dir, dst_dir):
+    """
+    Mirror src_dir into dst_dir using hard links, so no file data is copied when
+    both live on the same filesystem. Falls back to copying files that cannot be
+    linked (e.g. across devices).
+    """
+    src_dir = str(src_dir)
+    dst_dir = str(dst_dir)
+    can_link = True
+    for root, _, files in os.walk(src_dir):
+        target_dir = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            can_link = link_or_copy(os.path.join(root, name), os.path.join(target_dir, name), can_link)
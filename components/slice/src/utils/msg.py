@@ -1,18 +1,27 @@
+import os
 import pika
 import logging
 import functools
-import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+def _prefetch_count(prefetch_count=None):
+    # Unacked messages (i.e. tasks in flight) per consumer: SLICE_PREFETCH if set,
+    # otherwise one per CPU but at least 3
+    if prefetch_count is None:
+        prefetch_count = int(os.getenv('SLICE_PREFETCH', max(3, os.cpu_count() or 1)))
+    return max(1, prefetch_count)
 
 class MsgQueue:
     def __init__(self, url, queue, debug = False):
         if debug:
             logging.debug('Connecting to RabbitMQ at %s', url)
         self.queue = queue
-        self.connection = pika.BlockingConnection(pika.URLParameters(url))
+        self.parameters = pika.URLParameters(url)
+        self.connection = pika.BlockingConnection(self.parameters)
         self.channel = self.connection.channel()
         self.channel.queue_declare(queue=queue, durable = True)
-        self.threads = []
+        self._stopping = False
 
     def send(self, msg):
         self.channel.basic_publish(exchange='', routing_key=self.queue, body=msg)
@@ -35,34 +44,108 @@ class MsgQueue:
             logging.error('Channel is closed, cannot acknowledge message')
             # then do what?
     
-    def _callback_wrapper(self, callback):
-        # we need functional programming here!
+    def _callback_wrapper(self, callback, executor):
         # callback: (channel, method, properties, body) -> None
-        def _thread_callback_wrapper(callback):
-            def __thread_callback(connection, ch, method, properties, body):
-                try:
-                    # raise Exception('test')
-                    callback(ch, method, properties, body)
-                except Exception as e:
-                    logging.error('Failed to process message: %s', e)
-                    logging.error('Trackbace %s', traceback.format_exc())
-                    cb = functools.partial(self._ack_message, ch, method.delivery_tag, nack=True)
-                    connection.add_callback_threadsafe(cb)
-                    return 
-                cb = functools.partial(self._ack_message, ch, method.delivery_tag)
-                connection.add_callback_threadsafe(cb)
-            return __thread_callback
+        # Runs each message on the bounded executor instead of a thread of its own; the
+        # ack/nack is handed back to the connection's thread once the callback is done.
+        def on_done(connection, ch, method, future):
+            exc = future.exception()
+            if exc is not None:
+                logging.error('Failed to process message: %s', exc)
+                logging.error('Trackbace %s', ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+            cb = functools.partial(self._ack_message, ch, method.delivery_tag, nack=exc is not None)
+            connection.add_callback_threadsafe(cb)
+
         def __callback(ch, method, properties, body, args):
-            (connection, threads) = args
-            # delivery_tag = method.delivery_tag
-            t = threading.Thread(target=_thread_callback_wrapper(callback), args=(connection, ch, method, properties, body))
-            t.start()
-            threads.append(t)
+            (connection,) = args
+            future = executor.submit(callback, ch, method, properties, body)
+            future.add_done_callback(functools.partial(on_done, connection, ch, method))
         return __callback
     
-    def threaded_consume(self, callback):
-        # TODO: modify this number
-        self.channel.basic_qos(prefetch_count=3)
-        on_message_callback = functools.partial(self._callback_wrapper(callback), args=(self.connection, self.threads))
+    def threaded_consume(self, callback, prefetch_count = None):
+        # At most prefetch_count messages are unacked at a time, so that many workers
+        # are enough to run them all concurrently
+        prefetch_count = _prefetch_count(prefetch_count)
+        self.channel.basic_qos(prefetch_count=prefetch_count)
+        executor = ThreadPoolExecutor(max_workers=prefetch_count, thread_name_prefix='msg')
+        on_message_callback = functools.partial(self._callback_wrapper(callback, executor), args=(self.connection,))
         self.channel.basic_consume(queue=self.queue, on_message_callback=on_message_callback)
-        self.channel.start_consuming()
\ No newline at end of file
+        try:
+            self.channel.start_consuming()
+        finally:
+            executor.shutdown(wait=False)
+
+    def select_consume(self, callback, prefetch_count = None):
+        # callback: (channel, method, properties, body) -> None
+        # Runs the IO loop of an asynchronous SelectConnection in the calling thread and
+        # hands each message to a bounded worker pool, so pika callbacks never wait on a
+        # slice task. Blocks until stop() is called or the connection is lost.
+
+        prefetch_count = _prefetch_count(prefetch_count)
+        # the blocking connection would sit idle (and miss heartbeats) while we consume
+        self.close()
+        executor = ThreadPoolExecutor(max_workers=prefetch_count, thread_name_prefix='msg')
+        errors = []
+
+        def on_done(ch, method, future):
+            exc = future.exception()
+            if exc is not None:
+                logging.error('Failed to process message: %s', exc)
+                logging.error('Trackbace %s', ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+            cb = functools.partial(self._ack_message, ch, method.delivery_tag, nack=exc is not None)
+            self.connection.ioloop.add_callback_threadsafe(cb)
+
+        def on_message(ch, method, properties, body):
+            future = executor.submit(callback, ch, method, properties, body)
+            future.add_done_callback(functools.partial(on_done, ch, method))
+
+        def on_channel_open(channel):
+            channel.queue_declare(
+                queue=self.queue,
+                durable=True,
+                callback=lambda _frame: channel.basic_qos(
+                    prefetch_count=prefetch_count,
+                    callback=lambda _frame: channel.basic_consume(queue=self.queue, on_message_callback=on_message)
+                )
+            )
+
+        def on_open(connection):
+            connection.channel(on_open_callback=on_channel_open)
+
+        def on_open_error(connection, err):
+            errors.append(err)
+            connection.ioloop.stop()
+
+        def on_closed(connection, reason):
+            if not self._stopping:
+                errors.append(reason)
+            connection.ioloop.stop()
+
+        self._stopping = False
+        self.connection = pika.SelectConnection(
+            self.parameters,
+            on_open_callback=on_open,
+            on_open_error_callback=on_open_error,
+            on_close_callback=on_closed
+        )
+        try:
+            self.connection.ioloop.start()
+        finally:
+            executor.shutdown(wait=False)
+
+        if errors:
+            raise pika.exceptions.AMQPConnectionError(errors[-1])
+
+    def stop(self):
+        # Safe to call from other threads and from signal handlers
+        self._stopping = True
+        connection = self.connection
+        if not isinstance(connection, pika.SelectConnection):
+            return
+
+        def _close():
+            if connection.is_open:
+                connection.close()
+            else:
+                connection.ioloop.stop()
+        connection.ioloop.add_callback_threadsafe(_close)
@@ -1,12 +1,17 @@
 import logging
 import os
 import asyncio 
+import orjson
 from workers import db_worker, submit_worker, confirm_worker, bundle_worker
-from redisio import MessageSet, RedisStore
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from redisio import MessageSet, RedisStore, watch_failover
+from submission import create_http_session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 
 async def main():
+    # run each new task's first step right away instead of scheduling it; polls
+    # that finish without suspending never go through the event loop
+    asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
     db_url = os.getenv('DATABASE_URL')
     if not db_url:
         logging.error("Database URL is not set")
@@ -36,27 +41,34 @@ async def main():
     bundle_set = MessageSet(redis_sentinel_hosts, "bundle_set", sentinel=True, mastername=redis_master)
     storage = RedisStore(redis_sentinel_hosts, sentinel=True, mastername=redis_master)
     try:
-        await task_set.redis.ping()
-        await confirm_set.redis.ping()
-        await bundle_set.redis.ping()
-        await storage.redis.ping()
+        await asyncio.gather(
+            task_set.redis.ping(),
+            confirm_set.redis.ping(),
+            bundle_set.redis.ping(),
+            storage.redis.ping(),
+        )
     except Exception as e:
         logging.error(f"Failed to connect to Redis: {e}")
         exit(1)
         
-    db_engine = create_engine(db_url,
+    # asyncpg keeps DB round-trips off the blocking path; statements the workers
+    # repeat every refresh stay prepared in the per-connection cache
+    db_engine = create_async_engine(
+        make_url(db_url).set(drivername = "postgresql+asyncpg").update_query_dict({"prepared_statement_cache_size": "500"}),
         pool_pre_ping = True,
         pool_recycle = data_refresh_interval,
         max_overflow = 0,
         pool_size = 20,
         pool_timeout = 30,
+        json_deserializer = orjson.loads,
     )
 
-    db_task = asyncio.create_task(db_worker(db_engine, task_set, storage, data_refresh_interval))
-    submit_task = asyncio.create_task(submit_worker(base_url, task_set, confirm_set, storage))
-    confirm_task = asyncio.create_task(confirm_worker(base_url, confirm_set, db_engine, bundle_set, storage, task_set))
-    bundle_task = asyncio.create_task(bundle_worker(base_url, bundle_set, storage))    
-    await asyncio.gather(db_task, submit_task, confirm_task)
+    async with create_http_session(api_user, api_pass) as http_session, asyncio.TaskGroup() as tg:
+        tg.create_task(db_worker(db_engine, task_set, storage, data_refresh_interval))
+        tg.create_task(submit_worker(http_session, base_url, task_set, confirm_set, storage))
+        tg.create_task(confirm_worker(http_session, base_url, confirm_set, db_engine, bundle_set, storage, task_set))
+        tg.create_task(bundle_worker(http_session, base_url, bundle_set, storage))
+        tg.create_task(watch_failover([task_set, confirm_set, bundle_set, storage]))
     
     
 if __name__ == "__main__":
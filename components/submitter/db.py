@@ -10,6 +10,7 @@ from sqlalchemy import (
     BigInteger,
     Float,
     Enum,
+    Index,
     Sequence,
     JSON,
     func,
@@ -69,7 +70,16 @@ class SubmissionStatusEnum(enum.Enum):
     errored = "errored"
     inconclusive = "inconclusive"
 
+def enum_values(enum_cls, name):
+    # Still the native Postgres enum type, but bound and loaded as plain strings,
+    # so rows don't go through a Python enum lookup; writes are still checked
+    # against the allowed values
+    return Enum(*(member.value for member in enum_cls), name=name, validate_strings=True)
+
 # Define models using mapped_column
+# JSON documents (SARIF reports, metadata) are deferred: the submitter never reads
+# them, and with an async session they have to be requested explicitly anyway
+# (undefer/load_only) since lazy loads can't run implicitly
 
 class BugGroup(Base):
     __tablename__ = "bug_groups"
@@ -81,6 +91,7 @@ class BugGroup(Base):
 
 class BugProfile(Base):
     __tablename__ = "bug_profiles"
+    __table_args__ = (Index("ix_bug_profiles_task_id", "task_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[str] = mapped_column(String, nullable=False)
     harness_name: Mapped[str] = mapped_column(Text, nullable=False)
@@ -90,6 +101,7 @@ class BugProfile(Base):
 
 class Bug(Base):
     __tablename__ = "bugs"
+    __table_args__ = (Index("ix_bugs_task_id", "task_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -97,13 +109,14 @@ class Bug(Base):
     poc: Mapped[str] = mapped_column(Text, nullable=False)
     harness_name: Mapped[str] = mapped_column(Text, nullable=False)
     sanitizer: Mapped[str] = mapped_column(Text, nullable=False)
-    sarif_report: Mapped[dict] = mapped_column(JSONB)
+    sarif_report: Mapped[dict] = mapped_column(JSONB, deferred=True)
 
 class BugProfileStatus(Base):
     __tablename__ = "bug_profile_status"
+    __table_args__ = (Index("ix_bug_profile_status_bug_profile_id", "bug_profile_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     bug_profile_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    status: Mapped[SubmissionStatusEnum] = mapped_column(Enum(SubmissionStatusEnum, name="submissionstatusenum"), nullable=False)
+    status: Mapped[str] = mapped_column(enum_values(SubmissionStatusEnum, name="submissionstatusenum"), nullable=False)
 
 class DirectedSlice(Base):
     __tablename__ = "directed_slice"
@@ -138,7 +151,7 @@ class FuncTestResult(Base):
     __tablename__ = "func_test_result"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patch_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    result: Mapped[FuncTestStatusEnum] = mapped_column(Enum(FuncTestStatusEnum, name="functeststatusenum"), nullable=False)
+    result: Mapped[str] = mapped_column(enum_values(FuncTestStatusEnum, name="functeststatusenum"), nullable=False)
 
 class Message(Base):
     __tablename__ = "messages"
@@ -148,6 +161,7 @@ class Message(Base):
 
 class PatchBug(Base):
     __tablename__ = "patch_bugs"
+    __table_args__ = (Index("ix_patch_bugs_patch_id", "patch_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patch_id: Mapped[int] = mapped_column(Integer, nullable=False)
     bug_id: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -162,6 +176,7 @@ class PatchDebug(Base):
 
 class Patch(Base):
     __tablename__ = "patches"
+    __table_args__ = (Index("ix_patches_bug_profile_id", "bug_profile_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     bug_profile_id: Mapped[int] = mapped_column(Integer, nullable=False)
     patch: Mapped[str] = mapped_column(Text, nullable=False)
@@ -170,13 +185,15 @@ class Patch(Base):
 
 class PatchStatus(Base):
     __tablename__ = "patch_status"
+    __table_args__ = (Index("ix_patch_status_patch_id", "patch_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patch_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    status: Mapped[SubmissionStatusEnum] = mapped_column(Enum(SubmissionStatusEnum, name="submissionstatusenum"), nullable=False)
+    status: Mapped[str] = mapped_column(enum_values(SubmissionStatusEnum, name="submissionstatusenum"), nullable=False)
     functionality_tests_passing: Mapped[bool] = mapped_column(Boolean)
 
 class PatchSubmit(Base):
     __tablename__ = "patch_submit"
+    __table_args__ = (Index("ix_patch_submit_patch_id", "patch_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patch_id: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -184,6 +201,7 @@ class PatchSubmit(Base):
 
 class SarifResult(Base):
     __tablename__ = "sarif_results"
+    __table_args__ = (Index("ix_sarif_results_task_id_sarif_id", "task_id", "sarif_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[str] = mapped_column(String, nullable=False)
     sarif_id: Mapped[str] = mapped_column(String, nullable=False)
@@ -200,32 +218,34 @@ class SarifSlice(Base):
 
 class Sarif(Base):
     __tablename__ = "sarifs"
+    __table_args__ = (Index("ix_sarifs_task_id", "task_id"),)
     id: Mapped[str] = mapped_column(String, primary_key=True)
     task_id: Mapped[str] = mapped_column(String, nullable=False)
     message_id: Mapped[str] = mapped_column(String, nullable=False)
-    sarif: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    sarif: Mapped[dict] = mapped_column(JSONB, nullable=False, deferred=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     # Use a different attribute name for the "metadata" column to avoid conflicts.
-    meta: Mapped[dict] = mapped_column("metadata", JSON)
+    meta: Mapped[dict] = mapped_column("metadata", JSON, deferred=True)
 
 class Seed(Base):
     __tablename__ = "seeds"
+    __table_args__ = (Index("ix_seeds_task_id", "task_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     path: Mapped[str] = mapped_column(Text)
     harness_name: Mapped[str] = mapped_column(Text)
-    fuzzer: Mapped[FuzzerTypeEnum] = mapped_column(Enum(FuzzerTypeEnum, name="fuzzertypeenum"))
+    fuzzer: Mapped[str] = mapped_column(enum_values(FuzzerTypeEnum, name="fuzzertypeenum"))
     instance: Mapped[str] = mapped_column(Text, server_default="default")
     coverage: Mapped[float] = mapped_column(Float)
-    metric: Mapped[dict] = mapped_column(JSONB)
+    metric: Mapped[dict] = mapped_column(JSONB, deferred=True)
 
 class Source(Base):
     __tablename__ = "sources"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[str] = mapped_column(String, nullable=False)
     sha256: Mapped[str] = mapped_column(String(64), nullable=False)
-    source_type: Mapped[SourceTypeEnum] = mapped_column(Enum(SourceTypeEnum, name="sourcetypeenum"), nullable=False)
+    source_type: Mapped[str] = mapped_column(enum_values(SourceTypeEnum, name="sourcetypeenum"), nullable=False)
     url: Mapped[str] = mapped_column(String, nullable=False)
     path: Mapped[str] = mapped_column(String)
 
@@ -237,11 +257,11 @@ class Task(Base):
     deadline: Mapped[int] = mapped_column(BigInteger, nullable=False)
     focus: Mapped[str] = mapped_column(String, nullable=False)
     project_name: Mapped[str] = mapped_column(String, nullable=False)
-    task_type: Mapped[TaskTypeEnum] = mapped_column(Enum(TaskTypeEnum, name="tasktypeenum"), nullable=False)
-    status: Mapped[TaskStatusEnum] = mapped_column(Enum(TaskStatusEnum, name="taskstatusenum"), nullable=False)
+    task_type: Mapped[str] = mapped_column(enum_values(TaskTypeEnum, name="tasktypeenum"), nullable=False)
+    status: Mapped[str] = mapped_column(enum_values(TaskStatusEnum, name="taskstatusenum"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     # Remap the reserved "metadata" column to "meta" attribute.
-    meta: Mapped[dict] = mapped_column("metadata", JSON)
+    meta: Mapped[dict] = mapped_column("metadata", JSON, deferred=True)
 
 class User(Base):
     __tablename__ = "users"
@@ -8,7 +8,7 @@ from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.trace.status import Status, StatusCode
 import openlit
-import json
+import orjson
 import asyncio
 
 from contextvars import ContextVar
@@ -30,7 +30,9 @@ try:
     otlp_exporter = OTLPSpanExporter(
         endpoint=otel_exporter_otlp_endpoint, headers=otel_exporter_otlp_headers)
     # otlp_exporter = OTLPSpanExporter()
-    span_processor = BatchSpanProcessor(otlp_exporter)
+    # larger queue and batches so bursts of submit/confirm spans go out in fewer
+    # gRPC exports
+    span_processor = BatchSpanProcessor(otlp_exporter, max_queue_size=8192, schedule_delay_millis=2000, max_export_batch_size=1024)
     # Try to add our span processor to the existing provider
     provider = trace.get_tracer_provider()
     if hasattr(provider, "add_span_processor"):
@@ -46,25 +48,38 @@ except Exception as e:
 def log_action(crs_action_category: str, crs_action_name: str, task_metadata: dict, extra_attributes: dict | None = None):
     extra_attributes = extra_attributes or {}
     with tracer.start_as_current_span(crs_action_category) as span:
-        span.set_attribute("crs.action.category", crs_action_category)
-        span.set_attribute("crs.action.name", crs_action_name)
-
-        for key, value in task_metadata.items():
-            span.set_attribute(key, value)
-
-        for key, value in extra_attributes.items():
-            span.set_attribute(key, value)
+        span.set_attributes({
+            "crs.action.category": crs_action_category,
+            "crs.action.name": crs_action_name,
+            **task_metadata,
+            **extra_attributes,
+        })
 
         span.set_status(Status(StatusCode.OK))
 
     # print(f"Logged crs action: {crs_action_category} - {crs_action_name}")
     
+# task_id -> (expiry time, metadata); task metadata does not change during a task,
+# the TTL only lets a rewritten entry show up eventually
+_task_metadata_cache = {}
+TASK_METADATA_TTL = 300
+TASK_METADATA_CACHE_SIZE = 1024
+
 async def get_task_metadata(redisstore, task_id: str):
+    cached = _task_metadata_cache.get(task_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
     redis_client = redisstore
     if redis_client:
         task_metadata = await redis_client.get(f"global:task_metadata:{task_id}")
         if task_metadata:
-            return json.loads(task_metadata)
+            task_metadata = orjson.loads(task_metadata)
+            _task_metadata_cache.pop(task_id, None)
+            if len(_task_metadata_cache) >= TASK_METADATA_CACHE_SIZE:
+                # drop the oldest entry
+                del _task_metadata_cache[next(iter(_task_metadata_cache))]
+            _task_metadata_cache[task_id] = (time.monotonic() + TASK_METADATA_TTL, task_metadata)
+            return task_metadata
     
     return {
         "round.id": "test-round",
@@ -84,13 +99,7 @@ def create_span(name: str, attributes: dict | None = None, parent_span=None) ->
         The created span
     """
     context = trace.set_span_in_context(parent_span) if parent_span else None
-    span = tracer.start_span(name, context=context)
-    
-    if attributes:
-        for key, value in attributes.items():
-            span.set_attribute(key, value)
-            
-    return span
+    return tracer.start_span(name, context=context, attributes=attributes)
 
 def mark_span_failed(span: trace.Span, error: Exception):
     """Mark a span as failed with the given error.
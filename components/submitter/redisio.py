@@ -2,6 +2,20 @@ import redis.asyncio as aioredis
 import logging
 import asyncio
 
+# how long get_one waits server-side for a new member when the set is empty;
+# must stay below socket_timeout
+GET_ONE_BLOCK_SECONDS = 5
+
+# pause before retrying a failed command; the failover watcher normally has
+# already moved the client to the new master by then
+RECONNECT_DELAY_SECONDS = 0.5
+
+# how long the failover watcher waits for a message before polling again
+FAILOVER_POLL_SECONDS = 10
+
+def reconnect_master(client):
+    client.redis = client.sentinel.master_for(client.mastername, socket_timeout=30.0, retry_on_timeout=True, retry_on_error=[aioredis.ConnectionError])
+
 # a decorator to handle redis connection errors
 def redis_connection_error_handler(func):
     async def wrapper(*args, **kwargs):
@@ -12,20 +26,20 @@ def redis_connection_error_handler(func):
                 logging.error(f"Redis connection error: {e}")
                 if attempt < 2:
                     if hasattr(args[0], 'sentinel') and args[0].sentinel:
-                        args[0].redis = args[0].sentinel.master_for(args[0].mastername, socket_timeout=30.0, retry_on_timeout=True, retry_on_error=[aioredis.ConnectionError])
+                        reconnect_master(args[0])
                     else:
                         raise
-                    await asyncio.sleep(3)
+                    await asyncio.sleep(RECONNECT_DELAY_SECONDS)
                 else:
                     raise
             except aioredis.TimeoutError as e:
                 logging.error(f"Redis timeout error: {e}")
                 if attempt < 2:
                     if hasattr(args[0], 'sentinel') and args[0].sentinel:
-                        args[0].redis = args[0].sentinel.master_for(args[0].mastername, socket_timeout=30.0, retry_on_timeout=True, retry_on_error=[aioredis.ConnectionError])
+                        reconnect_master(args[0])
                     else:
                         raise
-                    await asyncio.sleep(3)
+                    await asyncio.sleep(RECONNECT_DELAY_SECONDS)
                 else:
                     raise
             except Exception as e:
@@ -33,6 +47,42 @@ def redis_connection_error_handler(func):
                 raise
     return wrapper
 
+async def watch_failover(clients):
+    """
+    Follows the sentinels' +switch-master announcements and moves every
+    sentinel-backed client to the new master as soon as a failover completes,
+    instead of waiting for its next command to fail against the old one.
+    """
+    clients = [client for client in clients if client.sentinel]
+    if not clients:
+        return
+    sentinel, mastername = clients[0].sentinel, clients[0].mastername
+    while True:
+        for node in sentinel.sentinels:
+            pubsub = node.pubsub()
+            try:
+                await pubsub.subscribe("+switch-master")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=FAILOVER_POLL_SECONDS)
+                    if message is None:
+                        continue
+                    # "<master name> <old ip> <old port> <new ip> <new port>"
+                    data = message["data"]
+                    data = data.decode() if isinstance(data, bytes) else data
+                    if data.split()[0] != mastername:
+                        continue
+                    logging.info(f"Redis master switched: {data}")
+                    for client in clients:
+                        old = client.redis
+                        reconnect_master(client)
+                        await old.connection_pool.disconnect()
+            except Exception as e:
+                # never let the watcher take the workers down with it
+                logging.warning(f"Lost sentinel subscription: {e}")
+            finally:
+                await pubsub.reset()
+        await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
 class MessageQueue:
     def __init__(self, url, queue_name, sentinel=False, mastername="mymaster"):
         if sentinel:
@@ -70,18 +120,32 @@ class MessageSet:
             self.redis = aioredis.Redis.from_pool(pool)
             self.sentinel = None
         self.set_name = set_name
+        # holds at most one wake-up token, pushed on add and popped by get_one
+        self.notify_name = f"{set_name}:notify"
+
+    def _notify(self, pipe):
+        pipe.lpush(self.notify_name, 1)
+        pipe.ltrim(self.notify_name, 0, 0)
     
     @redis_connection_error_handler
     async def add(self, message):
-        await self.redis.sadd(self.set_name, message)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(self.set_name, message)
+            self._notify(pipe)
+            await pipe.execute()
     
     @redis_connection_error_handler
     async def remove(self, message):
         await self.redis.srem(self.set_name, message)
     
     @redis_connection_error_handler
-    async def get_one(self):
-        return await self.redis.srandmember(self.set_name)
+    async def get_one(self, block=GET_ONE_BLOCK_SECONDS):
+        message = await self.redis.srandmember(self.set_name)
+        if message is None and block:
+            # empty set: block on the wake-up token instead of polling again
+            if await self.redis.blpop([self.notify_name], timeout=block) is not None:
+                message = await self.redis.srandmember(self.set_name)
+        return message
         
     
 class RedisStore:
@@ -97,8 +161,8 @@ class RedisStore:
             self.sentinel = None
 
     @redis_connection_error_handler
-    async def set(self, key, value):
-        await self.redis.set(key, value)
+    async def set(self, key, value, ex=None):
+        await self.redis.set(key, value, ex=ex)
 
     @redis_connection_error_handler
     async def get(self, key):
@@ -106,4 +170,13 @@ class RedisStore:
 
     @redis_connection_error_handler
     async def delete(self, key):
-        await self.redis.delete(key)
\ No newline at end of file
+        await self.redis.delete(key)
+
+    # batch variants: one MGET/MSET for all keys, a single round-trip
+    @redis_connection_error_handler
+    async def mget(self, keys):
+        return await self.redis.mget(keys)
+
+    @redis_connection_error_handler
+    async def mset(self, mapping):
+        await self.redis.mset(mapping)
\ No newline at end of file
@@ -1,8 +1,9 @@
-import requests 
+import aiohttp
+import orjson
 import base64
+import hashlib
 import os
 # from db import SanitizerEnum
-import json
 
 # sanitizer_map = {
 #     SanitizerEnum.ASAN: "address",
@@ -12,22 +13,35 @@ import json
 #     SanitizerEnum.UNKNOWN: "unknown"
 # }
 
+MAX_POV_SIZE = 2097152
+# a multiple of 3, so the encoded chunks concatenate without padding in between
+B64_CHUNK_SIZE = 3 * 64 * 1024
+
+def b64encode_file(path):
+    # size check before reading anything; the file is encoded chunk by chunk so only
+    # the encoded form is held in full
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size > MAX_POV_SIZE:
+            raise Exception("POV file is too large")
+        encoded = bytearray()
+        while chunk := f.read(B64_CHUNK_SIZE):
+            encoded += base64.b64encode(chunk)
+    return encoded.decode()
+
 def prepare_pov_submission_data(content):
     try:
-        pov_data = open(content.poc, "rb").read()
+        testcase = b64encode_file(content.poc)
     except FileNotFoundError:
         if os.getenv("AIXCC_LOCAL_DEBUG"):
-            pov_data = b"aaaa"
+            testcase = base64.b64encode(b"aaaa").decode()
         else:
             raise Exception(f"POV file {content.poc} not found")
-    if len(pov_data) > 2097152:
-        raise Exception("POV file is too large")
     return {
         "architecture": content.architecture,
         "fuzzer_name": content.harness_name,
         # "sanitizer": sanitizer_map[content.sanitizer],
         "sanitizer": content.sanitizer,
-        "testcase": base64.b64encode(pov_data).decode(),
+        "testcase": testcase,
         # TODO: modify this to generalize engine, this is a workaround for now
         "engine": "libfuzzer",
     }
@@ -59,35 +73,55 @@ def prepare_submission_data(typ, content):
     elif typ == "sarif":
         return prepare_sarif_submission_data(content)
     
-def submit_data(base_url, typ, task_id, data, sarif_id = None):
+# request headers for submissions, whose payload is already serialized JSON
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# how long an accepted submission is remembered for deduplication
+DEDUP_TTL_SECONDS = 24 * 3600
+
+def dedup_key(typ, task_id, data, sarif_id = None):
+    # identifies a submission by everything that goes into its request: the
+    # endpoint (type, task, sarif id) and the serialized payload
+    digest = hashlib.sha256(data if isinstance(data, bytes) else data.encode()).hexdigest()
+    return f"submitter:dedup:{typ}:{task_id}:{sarif_id or ''}:{digest}"
+
+def create_http_session(api_user, api_pass):
+    # one session for the whole process: keep-alive connections to the competition
+    # API are reused across submissions instead of reconnecting per request
+    return aiohttp.ClientSession(
+        auth = aiohttp.BasicAuth(api_user, api_pass),
+        connector = aiohttp.TCPConnector(limit = 64, keepalive_timeout = 60),
+    )
+
+async def submit_data(session, base_url, typ, task_id, data, sarif_id = None):
     
     if typ == "sarif":
         base_url = f"{base_url}/v1/task/{task_id}/broadcast-sarif-assessment/{sarif_id}/"
     else:
         base_url = f"{base_url}/v1/task/{task_id}/{typ}/"
 
-    # make http request
-    response = requests.post(base_url, json = json.loads(data), auth = requests.auth.HTTPBasicAuth(os.getenv("API_USER", "foo"), os.getenv("API_PASS", "bar")))
-    # if os.getenv("AIXCC_LOCAL_DEBUG"):
-    #     result = {f"{typ}_id": str(uuid.uuid4()), "status": "accepted"}
-    #     return result
-    if response.status_code != 200:
-        raise Exception(f"Failed to submit data: {response.status_code}")
-    result = response.json()
+    # make http request; data is already serialized JSON, send it as is
+    async with session.post(base_url, data = data, headers = _JSON_HEADERS) as response:
+        # if os.getenv("AIXCC_LOCAL_DEBUG"):
+        #     result = {f"{typ}_id": str(uuid.uuid4()), "status": "accepted"}
+        #     return result
+        if response.status != 200:
+            raise Exception(f"Failed to submit data: {response.status}")
+        result = await response.json(loads = orjson.loads, content_type = None)
     return result
 
-def confirm_submission(base_url, typ, task_id, submission_id):
+async def confirm_submission(session, base_url, typ, task_id, submission_id):
     # typ = pov or patch
     base_url = f"{base_url}/v1/task/{task_id}/{typ}/{submission_id}/"
 
     # make http request
-    response = requests.get(base_url, auth = requests.auth.HTTPBasicAuth(os.getenv("API_USER", "foo"), os.getenv("API_PASS", "bar")))
-    # if os.getenv("AIXCC_LOCAL_DEBUG"):
-    #     result = {"status": "accepted" if __import__("random").randint(0, 1) == 1 else "passed"}
-    #     return result
-    if response.status_code != 200:
-        raise Exception(f"Failed to confirm submission: {response.status_code}")
-    result = response.json()
+    async with session.get(base_url) as response:
+        # if os.getenv("AIXCC_LOCAL_DEBUG"):
+        #     result = {"status": "accepted" if __import__("random").randint(0, 1) == 1 else "passed"}
+        #     return result
+        if response.status != 200:
+            raise Exception(f"Failed to confirm submission: {response.status}")
+        result = await response.json(loads = orjson.loads, content_type = None)
     return result
 
 
@@ -1,13 +1,13 @@
 import asyncio
-from submission import prepare_submission_data, submit_data, confirm_submission
-from sqlalchemy import create_engine, select
+from submission import prepare_submission_data, submit_data, confirm_submission, dedup_key, DEDUP_TTL_SECONDS
+from sqlalchemy import create_engine, select, insert
 from sqlalchemy.orm import sessionmaker
 from db import BugProfileStatus, PatchStatus
 import logging
 from otlp import log_action, get_task_metadata, telemetry_spans, create_span, mark_span_failed, end_span, SpanContextManager
-import json
+import orjson
 
-async def submit_data_task(base_url, task_set, confirm_set, redisstore):
+async def submit_data_task(http_session, base_url, task_set, confirm_set, redisstore):
     lock = asyncio.Lock()
     async with lock:
         task = await task_set.get_one()
@@ -35,8 +35,18 @@ async def submit_data_task(base_url, task_set, confirm_set, redisstore):
     
     submit_data_span = create_span(f"Submitter: Submit {task_type} data", attributes, parent_span=root_span)
     
-    result = submit_data(base_url, task_type, task_id, data, sarif_id = id)
+    # an identical payload that was already accepted (e.g. the task was picked up
+    # again before being removed from the set) reuses the earlier response
+    submission_key = dedup_key(task_type, task_id, data, sarif_id = id)
+    cached = await redisstore.get(submission_key)
+    if cached is not None:
+        logging.info(f"{task_type} {id} for task {task_id} was already submitted, reusing the response")
+        result = orjson.loads(cached)
+    else:
+        result = await submit_data(http_session, base_url, task_type, task_id, data, sarif_id = id)
     if result["status"] == "accepted" or result["status"] == "inconclusive":
+        if cached is None:
+            await redisstore.set(submission_key, orjson.dumps(result), ex = DEDUP_TTL_SECONDS)
         if task_type != "sarif":
             submission_id = result[f"{task_type}_id"]
             logging.info(f"Submitted {task_type} {id} for task {task_id}, got submission id {submission_id}")
@@ -64,7 +74,7 @@ async def submit_data_task(base_url, task_set, confirm_set, redisstore):
         
         
 
-async def confirm_submission_task(base_url, confirm_set, db_session, bundle_set, redisstore, task_set):
+async def confirm_submission_task(http_session, base_url, confirm_set, db_session, bundle_set, redisstore, task_set):
     lock = asyncio.Lock()
     async with lock:
         task = await confirm_set.get_one()
@@ -97,7 +107,7 @@ async def confirm_submission_task(base_url, confirm_set, db_session, bundle_set,
     
     
     logging.info(f"Confirming {task_type} {id} for task {task_id}, submission id {submission_id}")
-    result = confirm_submission(base_url, task_type, task_id, submission_id)
+    result = await confirm_submission(http_session, base_url, task_type, task_id, submission_id)
     confirm_span.add_event(f"Confirming {task_type} {id} for task {task_id}, submission id {submission_id}")
     if task_type == "patch":
         # special usage for patch
@@ -114,13 +124,13 @@ async def confirm_submission_task(base_url, confirm_set, db_session, bundle_set,
                 # update information to database
                 # engine = create_engine(db_url)
                 # session = sessionmaker(bind = engine)()
-                patch_status = PatchStatus(
+                # plain INSERT: no ORM flush or RETURNING id for a row we never read back
+                await db_session.execute(insert(PatchStatus).values(
                     patch_id = int(id),
                     status = status,
                     functionality_tests_passing = func_test_result
-                )
-                db_session.add(patch_status)
-                db_session.commit()
+                ))
+                await db_session.commit()
                 await confirm_set.remove(task)
 
                 # bundle submission: if func test pass, submit bundle
@@ -152,6 +162,10 @@ async def confirm_submission_task(base_url, confirm_set, db_session, bundle_set,
             logging.error(f"Got a server side error of {task_type} {id} of task {task_id}. Need to resubmit")
             val = f"submitter:pov:{task_id}:{id}:{bug_profile_id}"
             async with lock:
+                # the resubmission must really reach the server
+                data = await redisstore.get(val)
+                if data is not None:
+                    await redisstore.delete(dedup_key("pov", task_id, data, sarif_id = id))
                 await confirm_set.remove(task)
                 await task_set.add(val)
             mark_span_failed(confirm_span, Exception("Server side error"))
@@ -164,12 +178,11 @@ async def confirm_submission_task(base_url, confirm_set, db_session, bundle_set,
                 # update information to database
                 # engine = create_engine(db_url)
                 # session = sessionmaker(bind = engine)()
-                pov_status = BugProfileStatus(
+                await db_session.execute(insert(BugProfileStatus).values(
                     bug_profile_id = int(bug_profile_id),
                     status = result["status"]
-                )
-                db_session.add(pov_status)
-                db_session.commit()
+                ))
+                await db_session.commit()
                 await confirm_set.remove(task)
 
                 # set the pov submission id to redis, for bundle submission
@@ -198,7 +211,7 @@ async def confirm_submission_task(base_url, confirm_set, db_session, bundle_set,
             end_span(root_span)
 
 
-async def bundle_submission_task(base_url, bundle_queue, redisstore):
+async def bundle_submission_task(http_session, base_url, bundle_queue, redisstore):
     lock = asyncio.Lock()
     async with lock:
         task = await bundle_queue.get_one()
@@ -206,9 +219,8 @@ async def bundle_submission_task(base_url, bundle_queue, redisstore):
             return
         _, _, task_id, bug_profile_id = task.decode().split(":")
         # at least we need a pov and a patch to submit a bundle
-        pov_uuid = await redisstore.get(f"submitter:bundle:bug_profile:{bug_profile_id}")
+        pov_uuid, patch_uuid = await redisstore.mget([f"submitter:bundle:bug_profile:{bug_profile_id}", f"submitter:bundle:patch:{bug_profile_id}"])
         pov_uuid = pov_uuid.decode() if pov_uuid is not None else None
-        patch_uuid = await redisstore.get(f"submitter:bundle:patch:{bug_profile_id}")
         patch_uuid = patch_uuid.decode() if patch_uuid is not None else None
     if pov_uuid is None or patch_uuid is None:
         return 
@@ -231,7 +243,7 @@ async def bundle_submission_task(base_url, bundle_queue, redisstore):
         "pov_id": pov_uuid,
         "patch_id": patch_uuid
     }
-    result = submit_data(base_url, "bundle", task_id, json.dumps(data))
+    result = await submit_data(http_session, base_url, "bundle", task_id, orjson.dumps(data))
     # no need to confirm bundle submission
     async with lock:
         await bundle_queue.remove(task)
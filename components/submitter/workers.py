@@ -1,18 +1,19 @@
 import asyncio
 from submission import prepare_submission_data
 from sqlalchemy import create_engine, select, text, func, literal
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
 from db import Bug, BugGroup, Task, Patch, BugProfile, PatchBug, PatchStatus, SarifResult, Sarif, BugProfileStatus, PatchSubmit
 from db import SubmissionStatusEnum
 import logging
-import json
+import orjson
 from tasks import submit_data_task, confirm_submission_task, bundle_submission_task
 import time
 import traceback
 
 async def fetch_data(db_engine, msg_set, redisstore):
     # engine = create_engine(db_url)
-    session = sessionmaker(bind = db_engine)()
+    # objects are read after commit; with an async session that must not trigger a lazy refresh
+    session = AsyncSession(db_engine, expire_on_commit = False)
     
     # get all the running tasks
     stmt = (
@@ -21,8 +22,8 @@ async def fetch_data(db_engine, msg_set, redisstore):
         # TODO: change this to status == "processing"
         ).where(Task.status == "processing")
     )
-    task_list = session.execute(stmt).scalars().all()
-    session.commit()
+    task_list = (await session.execute(stmt)).scalars().all()
+    await session.commit()
     
     logging.info(f"Found {len(task_list)} tasks that are processing")
     logging.debug(f"Task list: {task_list}")
@@ -39,8 +40,8 @@ async def fetch_data(db_engine, msg_set, redisstore):
         .distinct(BugGroup.bug_profile_id)
     )
     
-    bugs = session.execute(stmt).all()
-    session.commit()
+    bugs = (await session.execute(stmt)).all()
+    await session.commit()
 
     logging.info(f"Found {len(bugs)} bugs to submit")
     # logging.debug(f"Bug list: {bugs}")
@@ -51,8 +52,7 @@ async def fetch_data(db_engine, msg_set, redisstore):
         bug = bug_res[0]
         bug_profile_id = bug_res[1]
         async with lock:
-            data = await redisstore.get(f"submitter:pov:{bug.task_id}:{bug.id}:{bug_profile_id}")
-            bug_profile = await redisstore.get(f"submitter:bug_profile:{bug_profile_id}")
+            data, bug_profile = await redisstore.mget([f"submitter:pov:{bug.task_id}:{bug.id}:{bug_profile_id}", f"submitter:bug_profile:{bug_profile_id}"])
         if data is not None or bug_profile is not None:
             logging.info(f"POV task for bug {bug.id} / bug_profile {bug_profile_id} already submitted")
             continue
@@ -66,8 +66,10 @@ async def fetch_data(db_engine, msg_set, redisstore):
         logging.info(f"Submitting pov task for bug {bug.id}, bug profile id {bug_profile_id}")
         logging.debug(f"POV submission data: {pov_submission_data}")
         async with lock:
-            await redisstore.set(f"submitter:pov:{bug.task_id}:{bug.id}:{bug_profile_id}", json.dumps(pov_submission_data))
-            await redisstore.set(f"submitter:bug_profile:{bug_profile_id}", "submitted")
+            await redisstore.mset({
+                f"submitter:pov:{bug.task_id}:{bug.id}:{bug_profile_id}": orjson.dumps(pov_submission_data),
+                f"submitter:bug_profile:{bug_profile_id}": "submitted",
+            })
             if await redisstore.get(f"submitter:pov:{bug.task_id}:{bug.id}:{bug_profile_id}") is None:
                 logging.error(f"Failed to submit pov task for bug {bug.id}, bug profile id {bug_profile_id}")
                 continue
@@ -95,12 +97,12 @@ async def fetch_data(db_engine, msg_set, redisstore):
                 BugProfileStatus.bug_profile_id
             )
             .where(
-                BugProfileStatus.status == SubmissionStatusEnum.passed
+                BugProfileStatus.status == SubmissionStatusEnum.passed.value
             )
             .distinct()
         )
-        confirmed_bugs = session.execute(stmt).scalars().all()
-        session.commit()
+        confirmed_bugs = (await session.execute(stmt)).scalars().all()
+        await session.commit()
         logging.info(f"Found {len(confirmed_bugs)} confirmed bugs")
 
     #     unrepaired_patches = (
@@ -162,8 +164,8 @@ async def fetch_data(db_engine, msg_set, redisstore):
             .where(PatchStatus.functionality_tests_passing != True)
         )
 
-        failed_patches = session.execute(stmt).scalars().all()
-        session.commit()
+        failed_patches = (await session.execute(stmt)).scalars().all()
+        await session.commit()
         logging.debug(f"Func test failed patches: {failed_patches}")
         # logging.debug(f"Patch list: {patches}")
 
@@ -202,8 +204,8 @@ async def fetch_data(db_engine, msg_set, redisstore):
             )
         )
 
-        patch_submits = session.execute(stmt).all()
-        session.commit()
+        patch_submits = (await session.execute(stmt)).all()
+        await session.commit()
         logging.info(f"Found {len(patch_submits)} patch submits")
         logging.debug(f"Patch submit list: {patch_submits}")
         submission_list = []
@@ -233,7 +235,7 @@ async def fetch_data(db_engine, msg_set, redisstore):
         logging.info(f"Submitting patch task for bug {patch.id}, task {task_id}")
         logging.debug(f"Patch submission data: {patch_submission_data}")
         async with lock:
-            await redisstore.set(f"submitter:patch:{task_id}:{patch.id}:{patch.bug_profile_id}", json.dumps(patch_submission_data))
+            await redisstore.set(f"submitter:patch:{task_id}:{patch.id}:{patch.bug_profile_id}", orjson.dumps(patch_submission_data))
             if await redisstore.get(f"submitter:patch:{task_id}:{patch.id}:{patch.bug_profile_id}") is None:
                 logging.error(f"Failed to submit patch task for bug {patch.id}")
                 continue
@@ -250,8 +252,8 @@ async def fetch_data(db_engine, msg_set, redisstore):
         )
     )
     
-    sarifs = session.execute(stmt).scalars().all()
-    session.commit()
+    sarifs = (await session.execute(stmt)).scalars().all()
+    await session.commit()
     logging.info(f"Found {len(sarifs)} sarif reports to submit")
     # logging.debug(f"Sarif list: {sarifs}")
     for sarif in sarifs:
@@ -268,14 +270,14 @@ async def fetch_data(db_engine, msg_set, redisstore):
         logging.info(f"Submitting sarif {sarif.sarif_id}, task {sarif.task_id}")
         logging.debug(f"Sarif submission data: {sarif_submission_data}")
         async with lock:
-            await redisstore.set(f"submitter:sarif:{sarif.task_id}:{sarif.sarif_id}:{sarif.bug_profile_id}", json.dumps(sarif_submission_data))
+            await redisstore.set(f"submitter:sarif:{sarif.task_id}:{sarif.sarif_id}:{sarif.bug_profile_id}", orjson.dumps(sarif_submission_data))
             if await redisstore.get(f"submitter:sarif:{sarif.task_id}:{sarif.sarif_id}:{sarif.bug_profile_id}") is None:
                 logging.error(f"Failed to submit sarif {sarif.sarif_id}")
                 continue
             await msg_set.add(f"submitter:sarif:{sarif.task_id}:{sarif.sarif_id}:{sarif.bug_profile_id}")
     
     
-    session.close()
+    await session.close()
 
 async def db_worker(db_engine, msgqueue, redisstore, interval):
     while True:
@@ -291,38 +293,38 @@ async def db_worker(db_engine, msgqueue, redisstore, interval):
         
     
 
-async def submit_worker(base_url, msgqueue, confirm_queue, redisstore):
+async def submit_worker(http_session, base_url, msgqueue, confirm_queue, redisstore):
     while True:
         try:
-            await submit_data_task(base_url, msgqueue, confirm_queue, redisstore)
+            await submit_data_task(http_session, base_url, msgqueue, confirm_queue, redisstore)
         except Exception as e:
             logging.error(f"Error in submit_worker: {e}")
             logging.error(f"Traceback: {traceback.format_exc()}")
 
-async def confirm_worker(base_url, confirm_queue, db_engine, bundle_queue, redisstore, task_queue):
+async def confirm_worker(http_session, base_url, confirm_queue, db_engine, bundle_queue, redisstore, task_queue):
     # engine = create_engine(db_url)
-    db_session = sessionmaker(bind = db_engine)()
+    db_session = AsyncSession(db_engine, expire_on_commit = False)
     while True:
         try:
             for i in range(5):
                 try:
-                    db_session.execute(text("SELECT 1"))
+                    await db_session.execute(text("SELECT 1"))
                     # db_session.commit()
                     break
                 except Exception as e:
                     logging.warning(f"Database connection lost: {e}, reconnecting {i+1}")
                     await asyncio.sleep(1)
-                    db_session = sessionmaker(bind = db_engine)()
-            await confirm_submission_task(base_url, confirm_queue, db_session, bundle_queue, redisstore, task_queue)
+                    db_session = AsyncSession(db_engine, expire_on_commit = False)
+            await confirm_submission_task(http_session, base_url, confirm_queue, db_session, bundle_queue, redisstore, task_queue)
             await asyncio.sleep(1)
         except Exception as e:
             logging.error(f"Error in confirm_worker: {e}")
             logging.error(f"Traceback: {traceback.format_exc()}")
 
-async def bundle_worker(base_url, bundle_queue, redisstore):
+async def bundle_worker(http_session, base_url, bundle_queue, redisstore):
     while True:
         try:
-            await bundle_submission_task(base_url, bundle_queue, redisstore)
+            await bundle_submission_task(http_session, base_url, bundle_queue, redisstore)
             # await asyncio.sleep(1)
         except Exception as e:
             logging.error(f"Error in bundle_worker: {e}")